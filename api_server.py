@@ -0,0 +1,271 @@
+# api_server.py
+"""
+Read-only JSON API over the queries.py functions.
+
+    python api_server.py --port 8080
+    curl 'http://localhost:8080/api/top5_competitors'
+    curl 'http://localhost:8080/api/venues_in_country?country_name=Spain&page=1&page_size=50'
+
+ETags are derived from the ETL data generation, so conditional GETs answer
+304 without running the query until the next ETL run changes the data.
+"""
+import argparse
+import asyncio
+import gzip
+import inspect
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+
+import queries
+from config import API_HOST, API_PORT, DB_POOL_SIZE
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+GZIP_MIN_BYTES = 1024
+GENERATION_TTL = 1.0  # seconds a data generation lookup is reused
+RESPONSE_CACHE_SIZE = 256
+MAX_HEADER_BYTES = 16 * 1024
+
+# Query parameters that must parse as integers (answered with 400 otherwise)
+INT_PARAMS = {"last_change_id"}
+
+# Every public query helper becomes an endpoint: /api/<name>?<param>=...
+EXCLUDED = {"run_query", "data_generation"}
+ENDPOINTS = {
+    name: (fn, list(inspect.signature(fn).parameters))
+    for name, fn in inspect.getmembers(queries, inspect.isfunction)
+    if fn.__module__ == queries.__name__ and not name.startswith("_") and name not in EXCLUDED
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+        self.message = message or status.phrase
+
+
+class ApiServer:
+    def __init__(self, workers=DB_POOL_SIZE):
+        # one worker per pooled DB connection; queries are blocking SQLAlchemy calls
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-db")
+        self._generation = None
+        self._generation_at = 0.0
+        self._cache = OrderedDict()
+
+    async def generation(self):
+        now = time.monotonic()
+        if self._generation is None or now - self._generation_at > GENERATION_TTL:
+            loop = asyncio.get_running_loop()
+            self._generation = await loop.run_in_executor(self.executor, queries.data_generation)
+            self._generation_at = now
+        return self._generation
+
+    # --- request handling
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.send(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, {}, b"", keep_alive=False)
+                    break
+                try:
+                    method, target, version, headers = self.parse_head(head)
+                except HttpError as e:
+                    await self.send(writer, e.status, {}, self.error_body(e.status, e.message), keep_alive=False)
+                    break
+                # request bodies are never read, so only body-less methods may reuse the connection
+                keep_alive = method in ("GET", "HEAD") and self.keep_alive(version, headers)
+                try:
+                    status, extra, body = await self.dispatch(method, target, headers)
+                except HttpError as e:
+                    status, extra, body = e.status, {}, self.error_body(e.status, e.message)
+                except Exception as e:
+                    status, extra, body = HTTPStatus.INTERNAL_SERVER_ERROR, {}, self.error_body(
+                        HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+                if method == "HEAD":
+                    extra = dict(extra, **{"Content-Length": str(len(body))})
+                    body = b""
+                await self.send(writer, status, extra, body, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    @staticmethod
+    def parse_head(head):
+        """Split a request head into (method, target, version, headers); HttpError 400 if malformed."""
+        lines = head.decode("latin-1").split("\r\n")
+        parts = lines[0].split(" ")
+        if len(parts) != 3 or not all(parts) or not parts[2].startswith("HTTP/"):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        method, target, version = parts
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        return method.upper(), target, version, headers
+
+    @staticmethod
+    def keep_alive(version, headers):
+        conn = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            return conn == "keep-alive"
+        return conn != "close"
+
+    async def dispatch(self, method, target, headers):
+        if method not in ("GET", "HEAD"):
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED)
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if path == "/health":
+            return HTTPStatus.OK, {"Content-Type": "application/json"}, b'{"status": "ok"}'
+        if path in ("/", "/api"):
+            listing = {name: {"params": args} for name, (fn, args) in sorted(ENDPOINTS.items())}
+            return HTTPStatus.OK, {"Content-Type": "application/json"}, json.dumps(listing).encode()
+        if not path.startswith("/api/") or path[5:] not in ENDPOINTS:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"Unknown endpoint {path}")
+
+        name = path[5:]
+        use_gzip = self.accepts_gzip(headers.get("accept-encoding", ""))
+        generation = await self.generation()
+        etag = f'"{generation}{"-gz" if use_gzip else ""}"'
+        common = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+        if self.etag_matches(headers.get("if-none-match"), generation):
+            return HTTPStatus.NOT_MODIFIED, common, b""
+
+        key = (generation, name, url.query, use_gzip)
+        cached = self._cache.get(key)
+        if cached is None:
+            loop = asyncio.get_running_loop()
+            payload = await loop.run_in_executor(self.executor, self.run_endpoint, name, params, generation)
+            body = payload.encode()
+            compressed = use_gzip and len(body) >= GZIP_MIN_BYTES
+            if compressed:
+                body = gzip.compress(body, compresslevel=5)
+            cached = self._remember(key, (body, compressed))
+        else:
+            self._cache.move_to_end(key)
+        body, compressed = cached
+
+        extra = dict(common, **{"Content-Type": "application/json"})
+        if compressed:
+            extra["Content-Encoding"] = "gzip"
+        return HTTPStatus.OK, extra, body
+
+    @staticmethod
+    def accepts_gzip(accept_encoding):
+        """True if Accept-Encoding allows gzip; an explicit (or wildcard) q=0 refuses it."""
+        qualities = {}
+        for item in accept_encoding.split(","):
+            coding, *params = [p.strip() for p in item.split(";")]
+            if not coding:
+                continue
+            q = 1.0
+            for p in params:
+                name, _, value = p.partition("=")
+                if name.strip().lower() == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            qualities[coding.lower()] = q
+        return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+    @staticmethod
+    def etag_matches(if_none_match, generation):
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag.strip('"').removesuffix("-gz") == generation:
+                return True
+        return False
+
+    def _remember(self, key, entry):
+        # responses only change with the data generation, so keep the rendered bytes
+        self._cache[key] = entry
+        while len(self._cache) > RESPONSE_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def run_endpoint(name, params, generation):
+        fn, args = ENDPOINTS[name]
+        missing = [a for a in args if a not in params]
+        if missing:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Missing query parameter(s): {', '.join(missing)}")
+        try:
+            page = int(params.get("page", 1))
+            page_size = min(int(params.get("page_size", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "page and page_size must be integers")
+        if page < 1 or page_size < 1:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "page and page_size must be positive")
+        for a in INT_PARAMS.intersection(args):
+            try:
+                int(params[a])
+            except ValueError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, f"{a} must be an integer")
+
+        df = fn(**{a: params[a] for a in args})
+        start = (page - 1) * page_size
+        rows = df.iloc[start:start + page_size]
+        # to_json handles NaN/None and numpy types
+        return (
+            '{"endpoint": %s, "generation": %s, "page": %d, "page_size": %d, "total": %d, "data": %s}'
+            % (json.dumps(name), json.dumps(generation), page, page_size, len(df), rows.to_json(orient="records"))
+        )
+
+    @staticmethod
+    def error_body(status, message):
+        return json.dumps({"error": status.phrase, "detail": message}).encode()
+
+    @staticmethod
+    async def send(writer, status, headers, body, keep_alive):
+        head = [f"HTTP/1.1 {status.value} {status.phrase}", f"Date: {formatdate(usegmt=True)}"]
+        if status != HTTPStatus.NOT_MODIFIED:
+            head.append(f"Content-Length: {headers.pop('Content-Length', len(body))}")
+        head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        head.extend(f"{k}: {v}" for k, v in headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host, port, workers):
+    api = ApiServer(workers)
+    server = await asyncio.start_server(api.handle, host, port, limit=MAX_HEADER_BYTES)
+    print(f"Serving {len(ENDPOINTS)} endpoints on http://{host}:{port}/api")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only JSON API over queries.py")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=DB_POOL_SIZE, help="DB worker threads (match pool size)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
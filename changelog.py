@@ -0,0 +1,141 @@
+# changelog.py
+"""
+Change-data-capture for the ETL loaders.
+
+Before a loader writes, diff_rows() compares the incoming records with what is
+stored and returns insert/update/delete entries with old and new values.
+record_changes() appends them to the change_log table in the loader's own
+transaction; publish() then writes them to rotated JSONL files once committed.
+change_log is the source of truth: a failed publish is reported, never raised,
+since the caller's data is already committed.
+
+Consumers poll `SELECT ... FROM change_log WHERE change_id > :last_seen`
+(queries.changes_since) or tail the JSONL files. The loaders only upsert and
+append, so they currently emit inserts and updates; 'delete' is reserved.
+A ranking row is only logged when it differs from the competitor's previous one.
+"""
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from sqlalchemy import text, bindparam, insert
+from config import CHANGELOG_DIR, CHANGELOG_MAX_BYTES, CHANGELOG_BACKUPS
+from models import ChangeLogEntry
+import pg_bulk
+
+# Tables whose changes are captured (every loaded table, so data_generation() sees all writes)
+CDC_TABLES = ("categories", "competitions", "complexes", "venues", "competitors", "competitor_rankings")
+RANKING_COLUMNS = ["rank", "movement", "points", "competitions_played"]
+LOOKUP_CHUNK = 500  # keys per IN (...) lookup, below SQLite's bound-parameter limit
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _lookup(conn, sql, keys):
+    stmt = text(sql).bindparams(bindparam("keys", expanding=True))
+    found = {}
+    for start in range(0, len(keys), LOOKUP_CHUNK):
+        for row in conn.execute(stmt, {"keys": keys[start:start + LOOKUP_CHUNK]}).mappings():
+            found[row["_key"]] = dict(row)
+    return found
+
+
+def diff_rows(conn, table, rows):
+    """Change entries for writing `rows` into `table`, relative to the rows currently stored."""
+    if table not in CDC_TABLES or not rows:
+        return []
+    key, columns = pg_bulk.TABLES[table]
+    changed_at = _now().isoformat()
+
+    if key is None:
+        # rankings are append-only: a changed row is an insert; old = the competitor's previous ranking
+        ids = sorted({r["competitor_id"] for r in rows})
+        previous = _lookup(conn, (
+            f"SELECT competitor_id AS _key, {', '.join(RANKING_COLUMNS)} FROM competitor_rankings "
+            "WHERE rank_id IN (SELECT MAX(rank_id) FROM competitor_rankings "
+            "WHERE competitor_id IN :keys GROUP BY competitor_id)"
+        ), ids)
+        entries = []
+        for r in rows:
+            old = previous.get(r["competitor_id"])
+            if old is not None:
+                old = {c: old.get(c) for c in RANKING_COLUMNS}
+            new = {c: r.get(c) for c in columns}
+            previous[r["competitor_id"]] = new
+            if old is not None and all(old[c] == new.get(c) for c in RANKING_COLUMNS):
+                continue  # same standing as last time; the appended row is not a change
+            entries.append({
+                "table": table, "op": "insert", "key": r["competitor_id"],
+                "old": old, "new": new, "changed_at": changed_at,
+            })
+        return entries
+
+    # last occurrence of a key wins, like session.merge
+    latest = {r[key]: {c: r.get(c) for c in columns} for r in rows}
+    current = _lookup(conn, f"SELECT {key} AS _key, {', '.join(columns)} FROM {table} WHERE {key} IN :keys",
+                      list(latest))
+    entries = []
+    for k, new in latest.items():
+        old = current.get(k)
+        if old is None:
+            entries.append({"table": table, "op": "insert", "key": k, "old": None, "new": new,
+                            "changed_at": changed_at})
+            continue
+        old.pop("_key")
+        diff = [c for c in columns if old.get(c) != new.get(c)]
+        if diff:
+            entries.append({"table": table, "op": "update", "key": k,
+                            "old": {c: old.get(c) for c in diff}, "new": {c: new.get(c) for c in diff},
+                            "changed_at": changed_at})
+    return entries
+
+
+def record_changes(conn, entries, run_id=None):
+    """Append entries to the change_log table inside the caller's transaction."""
+    if not entries:
+        return
+    for e in entries:
+        e["run_id"] = run_id
+    conn.execute(insert(ChangeLogEntry.__table__), [{
+        "run_id": run_id,
+        "table_name": e["table"],
+        "op": e["op"],
+        "row_key": str(e["key"]),
+        "old_values": json.dumps(e["old"], default=str) if e["old"] is not None else None,
+        "new_values": json.dumps(e["new"], default=str) if e["new"] is not None else None,
+        "changed_at": datetime.fromisoformat(e["changed_at"]),
+    } for e in entries])
+
+
+_feed = None
+
+def _feed_logger():
+    global _feed
+    if _feed is None:
+        os.makedirs(CHANGELOG_DIR, exist_ok=True)
+        handler = RotatingFileHandler(
+            os.path.join(CHANGELOG_DIR, "changes.jsonl"),
+            maxBytes=CHANGELOG_MAX_BYTES, backupCount=CHANGELOG_BACKUPS, encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _feed = logging.getLogger("sportradar.changes")
+        _feed.setLevel(logging.INFO)
+        _feed.propagate = False
+        _feed.addHandler(handler)
+    return _feed
+
+
+def publish(entries):
+    """Write committed change entries to the rotated JSONL feed. Never raises."""
+    if not entries:
+        return
+    try:
+        feed = _feed_logger()
+        for e in entries:
+            feed.info(json.dumps(e, default=str, sort_keys=True))
+    except Exception as e:
+        # the entries are already in change_log; consumers can catch up with changes_since
+        print(f"WARNING: could not publish {len(entries)} change entries to the feed:", e)
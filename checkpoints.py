@@ -0,0 +1,189 @@
+# checkpoints.py
+"""
+Checkpointed ETL runs.
+
+Every fetched payload and every loaded batch is recorded in etl_checkpoints
+under an idempotency key, in the same transaction as the batch itself.
+A restarted run resumes the latest etl_runs row if it failed less than
+ETL_RESUME_MAX_AGE_HOURS ago: completed endpoints are skipped, fetched payloads are reused and only batches
+without a checkpoint are written. Once a run completes its stored payloads
+are cleared; the checkpoint rows stay as the run's audit trail.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from config import ETL_BATCH_SIZE, ETL_RESUME_MAX_AGE_HOURS
+from db_handler import SessionLocal
+from models import (
+    Category, Competition, Complex, Venue, Competitor, CompetitorRanking, EtlRun, EtlCheckpoint
+)
+import pg_bulk
+import changelog
+
+MODELS = {
+    "categories": Category,
+    "competitions": Competition,
+    "complexes": Complex,
+    "venues": Venue,
+    "competitors": Competitor,
+    "competitor_rankings": CompetitorRanking,
+}
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _hours_ago(ts):
+    return (_now() - ts).total_seconds() / 3600
+
+
+def start_or_resume_run(fresh=False, max_age_hours=ETL_RESUME_MAX_AGE_HOURS):
+    """
+    Return the run_id of the latest run if it failed within the last `max_age_hours`,
+    else of a new run. Runs still 'running' (possibly in another process) are never resumed.
+    """
+    session = SessionLocal()
+    try:
+        if not fresh:
+            latest = session.query(EtlRun).order_by(EtlRun.run_id.desc()).first()
+            if latest is not None and latest.status == "failed":
+                age = _hours_ago(latest.started_at)
+                if age > max_age_hours:
+                    print(f"Not resuming ETL run {latest.run_id}: started {age:.1f}h ago "
+                          f"(limit {max_age_hours:g}h); starting a new run.")
+                else:
+                    # claim it atomically so two overlapping invocations cannot both resume it
+                    claimed = session.execute(
+                        update(EtlRun)
+                        .where(EtlRun.run_id == latest.run_id, EtlRun.status == "failed")
+                        .values(status="running", error=None)
+                    ).rowcount
+                    session.commit()
+                    if claimed:
+                        print(f"Resuming failed ETL run {latest.run_id} (started {age:.1f}h ago).")
+                        return latest.run_id
+        run = EtlRun(status="running", started_at=_now())
+        session.add(run)
+        session.commit()
+        return run.run_id
+    finally:
+        session.close()
+
+
+def finish_run(run_id, error=None):
+    session = SessionLocal()
+    try:
+        run = session.get(EtlRun, run_id)
+        run.status = "failed" if error else "complete"
+        run.error = str(error) if error else None
+        run.finished_at = _now()
+        if not error:
+            # a complete run is never resumed, so its raw API payloads are dead weight
+            (session.query(EtlCheckpoint)
+             .filter(EtlCheckpoint.run_id == run_id, EtlCheckpoint.step == "fetch")
+             .update({EtlCheckpoint.payload: None}, synchronize_session=False))
+        session.commit()
+    finally:
+        session.close()
+
+
+def _checkpoint(session, key):
+    return session.query(EtlCheckpoint).filter_by(idempotency_key=key).first()
+
+
+def endpoint_done(run_id, endpoint):
+    session = SessionLocal()
+    try:
+        return _checkpoint(session, f"{run_id}:{endpoint}:done") is not None
+    finally:
+        session.close()
+
+
+def mark_endpoint_done(run_id, endpoint, row_count):
+    session = SessionLocal()
+    try:
+        session.add(EtlCheckpoint(
+            run_id=run_id, endpoint=endpoint, step="done", batch_no=0,
+            idempotency_key=f"{run_id}:{endpoint}:done", row_count=row_count, created_at=_now(),
+        ))
+        session.commit()
+    finally:
+        session.close()
+
+
+def fetch_with_checkpoint(run_id, endpoint, fetch_fn):
+    """Return the endpoint's payload, fetching it only if this run has not stored it yet."""
+    key = f"{run_id}:{endpoint}:fetch"
+    session = SessionLocal()
+    try:
+        cp = _checkpoint(session, key)
+        if cp is not None:
+            print(f"  {endpoint}: reusing payload fetched {_hours_ago(cp.created_at):.1f}h ago "
+                  f"earlier in this run")
+            return json.loads(cp.payload)
+        payload = fetch_fn()
+        session.add(EtlCheckpoint(
+            run_id=run_id, endpoint=endpoint, step="fetch", batch_no=0,
+            idempotency_key=key, payload=json.dumps(payload), created_at=_now(),
+        ))
+        session.commit()
+        return payload
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def batch_key(run_id, endpoint, table, batch_no, rows):
+    digest = hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return f"{run_id}:{endpoint}:{table}:{batch_no}:{digest}"
+
+
+def store_batch(session, table, rows):
+    if pg_bulk.use_bulk_load():
+        conn = session.connection()
+        stage = pg_bulk.stage_rows(conn, table, rows)
+        pg_bulk.merge_staged(conn, table, stage)
+    elif table == "competitor_rankings":
+        session.add_all(CompetitorRanking(**r) for r in rows)  # append-only
+    else:
+        model = MODELS[table]
+        for r in rows:
+            session.merge(model(**r))
+
+
+def load_batches(run_id, endpoint, datasets, batch_size=ETL_BATCH_SIZE):
+    """
+    Load [(table, rows), ...] in batches. Each batch and its checkpoint commit together,
+    so a batch is either fully loaded and recorded or not at all.
+    Returns (batches_loaded, batches_skipped).
+    """
+    loaded = skipped = 0
+    session = SessionLocal()
+    try:
+        for table, rows in datasets:
+            for batch_no, start in enumerate(range(0, len(rows), batch_size)):
+                batch = rows[start:start + batch_size]
+                key = batch_key(run_id, endpoint, table, batch_no, batch)
+                if _checkpoint(session, key) is not None:
+                    skipped += 1
+                    continue
+                changes = changelog.diff_rows(session.connection(), table, batch)
+                store_batch(session, table, batch)
+                changelog.record_changes(session.connection(), changes, run_id)
+                session.add(EtlCheckpoint(
+                    run_id=run_id, endpoint=endpoint, step="load", dataset=table, batch_no=batch_no,
+                    idempotency_key=key, row_count=len(batch), created_at=_now(),
+                ))
+                session.commit()
+                changelog.publish(changes)
+                loaded += 1
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    return loaded, skipped
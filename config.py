@@ -16,3 +16,18 @@ BASE_URL = f"https://api.sportradar.com/tennis/{ACCESS_LEVEL}/v3/{LANG}"
 
 # DB
 DB_URL = os.getenv("DATABASE_URL", "sqlite:///sportradar.db")  # default local sqlite file
+# ETL load mode: 'merge' writes straight into the live tables,
+# 'swap' builds shadow tables and swaps them in atomically (see shadow_load.py)
+ETL_LOAD_MODE = os.getenv("ETL_LOAD_MODE", "merge")
+ETL_BATCH_SIZE = int(os.getenv("ETL_BATCH_SIZE", "500"))  # rows per checkpointed batch
+# a failed run older than this is not resumed (its fetched payloads are stale); a new run starts
+ETL_RESUME_MAX_AGE_HOURS = float(os.getenv("ETL_RESUME_MAX_AGE_HOURS", "6"))
+# Change-data-capture JSONL feed (changelog.py)
+CHANGELOG_DIR = os.getenv("CHANGELOG_DIR", "changes")
+CHANGELOG_MAX_BYTES = int(os.getenv("CHANGELOG_MAX_BYTES", str(10 * 1024 * 1024)))
+CHANGELOG_BACKUPS = int(os.getenv("CHANGELOG_BACKUPS", "10"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+
+# JSON API server (api_server.py)
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8080"))
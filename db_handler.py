@@ -1,7 +1,9 @@
 # db_handler.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker
-from config import DB_URL
+from config import DB_URL, DB_POOL_SIZE
 from models import Base
 
 # If using SQLite, allow connections across threads (Streamlit uses threads)
@@ -9,8 +11,21 @@ connect_args = {}
 if DB_URL.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
 
+# Pool sizing for concurrent readers (API server worker threads). Only QueuePool takes these
+# arguments; SQLite uses NullPool (file, SQLAlchemy 1.4) or SingletonThreadPool (in-memory).
+url = make_url(DB_URL)
+pool_args = {}
+if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+    pool_args = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_POOL_SIZE, "pool_pre_ping": True}
+
 # create engine
-engine = create_engine(DB_URL, echo=False, future=True, connect_args=connect_args)
+engine = create_engine(DB_URL, echo=False, future=True, connect_args=connect_args, **pool_args)
+
+# WAL lets dashboard readers keep reading while an ETL run writes
+if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+    @event.listens_for(engine, "connect")
+    def _sqlite_wal(dbapi_conn, _record):
+        dbapi_conn.execute("PRAGMA journal_mode=WAL")
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
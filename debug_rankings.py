@@ -1,9 +1,18 @@
 # debug_rankings.py
-import os, json, textwrap
+"""
+Debug & query profiling CLI.
+
+    python debug_rankings.py                     # profile every queries.py function
+    python debug_rankings.py --json report.json  # also write a machine-readable report
+    python debug_rankings.py --baseline report.json   # fail on plan/latency regressions
+    python debug_rankings.py --samples --api     # the old table samples + raw API preview
+"""
+import argparse, inspect, json, statistics, sys, textwrap, time
 import requests
 from sqlalchemy import text
 from db_handler import engine
 from config import API_KEY, BASE_URL, FORMAT
+import queries
 
 def db_counts_and_samples():
     print("=== DB TABLE COUNTS ===")
@@ -68,14 +77,215 @@ def call_double_rankings_api():
         print(textwrap.fill(text_snip, width=120))
     print()
 
-def main():
-    print("CONFIG CHECK")
-    print("API_KEY present:", bool(API_KEY))
-    print("BASE_URL:", BASE_URL)
-    print("FORMAT:", FORMAT)
+# ========== Query profiler ==========
+PROFILE_EXCLUDED = {"run_query", "data_generation"}
+REGRESSION_TOLERANCE = 1.5  # p95 may grow by this factor before --baseline fails
+REGRESSION_MIN_MS = 1.0     # ...and by at least this much, so sub-millisecond noise is ignored
+
+def sample_params(conn):
+    """Realistic arguments for the parameterised query helpers, taken from the data itself."""
+    def first(sql, default):
+        row = conn.execute(text(sql)).first()
+        return row[0] if row and row[0] else default
+    return {
+        "category_name": first("SELECT category_name FROM categories ORDER BY category_name LIMIT 1", "ATP"),
+        "country_name": first(
+            "SELECT country FROM competitors GROUP BY country ORDER BY COUNT(*) DESC LIMIT 1", "Croatia"),
+        "complex_name": first("SELECT complex_name FROM complexes ORDER BY complex_name LIMIT 1", "Melbourne Park"),
+        "last_change_id": 0,
+    }
+
+def capture_queries(params):
+    """Call every query helper with run_query intercepted; returns {name: (sql, bound params)}."""
+    captured = {}
+    original = queries.run_query
+    try:
+        for name, fn in inspect.getmembers(queries, inspect.isfunction):
+            if fn.__module__ != queries.__name__ or name.startswith("_") or name in PROFILE_EXCLUDED:
+                continue
+            args = {a: params[a] for a in inspect.signature(fn).parameters}
+            queries.run_query = lambda sql, p=None, _name=name: captured.__setitem__(_name, (sql.strip(), p or {}))
+            fn(**args)
+    finally:
+        queries.run_query = original
+    return captured
+
+def explain(conn, sql, params):
+    """Return (plan lines, flags) for a statement on the current dialect."""
+    flags = set()
+    stmt = sql.rstrip().rstrip(";")
+    if conn.dialect.name == "postgresql":
+        plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {stmt}"), params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        lines = []
+        def walk(node, depth=0):
+            kind = node.get("Node Type", "")
+            lines.append("  " * depth + f"{kind} {node.get('Relation Name', '')}".rstrip()
+                         + f" (rows={node.get('Actual Rows')}, ms={node.get('Actual Total Time')})")
+            if kind == "Seq Scan":
+                flags.add(f"full_scan:{node.get('Relation Name')}")
+            if kind in ("Sort", "Incremental Sort") and "external" in str(node.get("Sort Method", "")).lower():
+                flags.add("external_sort")
+            for child in node.get("Plans", []):
+                walk(child, depth + 1)
+        walk(plan[0]["Plan"])
+        return lines, sorted(flags)
+
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {stmt}"), params).all()
+    lines = [r[3] for r in rows]
+    for detail in lines:
+        if detail.startswith("SCAN ") and "INDEX" not in detail:
+            flags.add("full_scan:" + detail.split()[1])
+        if "TEMP B-TREE" in detail:
+            flags.add("temp_btree:" + detail.split("FOR ", 1)[-1].lower().replace(" ", "_"))
+        if "AUTOMATIC" in detail:
+            flags.add("automatic_index:" + detail.split()[1])
+    return lines, sorted(flags)
+
+def time_query(conn, sql, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = conn.execute(text(sql), params).all()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95_idx = min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))
+    return {
+        "rows": len(rows),
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[p95_idx], 3),
+        "max_ms": round(timings[-1], 3),
+    }
+
+def storage_report(conn):
+    """Row counts plus table/index sizes in bytes (dbstat on SQLite, pg_*_size on PostgreSQL)."""
+    report = {"tables": {}, "indexes": {}}
+    if conn.dialect.name == "postgresql":
+        for r in conn.execute(text(
+            "SELECT relname, pg_relation_size(relid) AS table_bytes, pg_indexes_size(relid) AS index_bytes "
+            "FROM pg_catalog.pg_statio_user_tables"
+        )).mappings():
+            report["tables"][r["relname"]] = {"bytes": r["table_bytes"], "index_bytes": r["index_bytes"]}
+        for r in conn.execute(text(
+            "SELECT indexrelname, relname, pg_relation_size(indexrelid) AS bytes FROM pg_catalog.pg_stat_user_indexes"
+        )).mappings():
+            report["indexes"][r["indexrelname"]] = {"table": r["relname"], "bytes": r["bytes"]}
+    else:
+        objects = conn.execute(text(
+            "SELECT name, type, tbl_name FROM sqlite_master WHERE type IN ('table', 'index') "
+            "AND name NOT LIKE 'sqlite_%' AND sql IS NOT NULL"
+        )).all()
+        try:
+            sizes = dict(conn.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")).all())
+        except Exception:
+            sizes = {}  # SQLite built without the dbstat virtual table
+        for name, kind, table in objects:
+            if kind == "table":
+                report["tables"][name] = {"bytes": sizes.get(name)}
+            else:
+                report["indexes"][name] = {"table": table, "bytes": sizes.get(name)}
+        # implicit primary key indexes
+        for name, size in sizes.items():
+            if name.startswith("sqlite_autoindex_"):
+                report["indexes"][name] = {"table": name[len("sqlite_autoindex_"):].rsplit("_", 1)[0], "bytes": size}
+    for name, info in report["tables"].items():
+        try:
+            info["rows"] = conn.execute(text(f'SELECT COUNT(*) FROM "{name}"')).scalar()
+        except Exception as e:
+            conn.rollback()
+            info["rows"] = f"ERROR: {e}"
+    return report
+
+def profile(repeat=20):
+    report = {"dialect": engine.dialect.name, "repeat": repeat, "queries": {}}
+    with engine.connect() as conn:
+        params = sample_params(conn)
+        for name, (sql, bound) in sorted(capture_queries(params).items()):
+            entry = {"sql": sql, "params": bound}
+            try:
+                entry["plan"], entry["flags"] = explain(conn, sql, bound)
+                entry.update(time_query(conn, sql, bound, repeat))
+            except Exception as e:
+                # on PostgreSQL a failed statement aborts the transaction; start a new one
+                conn.rollback()
+                entry["error"] = str(e)
+            report["queries"][name] = entry
+        report["storage"] = storage_report(conn)
+    return report
+
+def print_report(report):
+    print(f"=== QUERY PROFILE ({report['dialect']}, {report['repeat']} runs each) ===")
+    print(f"{'query':40} {'rows':>7} {'p50 ms':>9} {'p95 ms':>9}  flags")
+    for name, q in report["queries"].items():
+        if "error" in q:
+            print(f"{name:40} ERROR: {q['error']}")
+            continue
+        print(f"{name:40} {q['rows']:>7} {q['p50_ms']:>9.3f} {q['p95_ms']:>9.3f}  {', '.join(q['flags']) or '-'}")
+    print()
+    print("=== STORAGE ===")
+    for name, t in sorted(report["storage"]["tables"].items()):
+        print(f"table {name:34} rows={t.get('rows')} bytes={t.get('bytes')}")
+    for name, i in sorted(report["storage"]["indexes"].items()):
+        print(f"index {name:34} on {i['table']} bytes={i.get('bytes')}")
     print()
-    db_counts_and_samples()
-    call_double_rankings_api()
+
+def compare_to_baseline(report, baseline):
+    """List regressions against a previous report: new plan flags, p95 growth beyond tolerance."""
+    problems = []
+    for name, q in report["queries"].items():
+        old = baseline.get("queries", {}).get(name)
+        if not old or "error" in old:
+            continue
+        if "error" in q:
+            problems.append(f"{name}: now fails ({q['error']})")
+            continue
+        new_flags = sorted(set(q["flags"]) - set(old.get("flags", [])))
+        if new_flags:
+            problems.append(f"{name}: new plan flags {new_flags}")
+        if (old.get("p95_ms") and q["p95_ms"] > old["p95_ms"] * REGRESSION_TOLERANCE
+                and q["p95_ms"] - old["p95_ms"] >= REGRESSION_MIN_MS):
+            problems.append(f"{name}: p95 {old['p95_ms']}ms -> {q['p95_ms']}ms")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile queries.py against the configured database")
+    parser.add_argument("--repeat", type=int, default=20, help="timed executions per query")
+    parser.add_argument("--json", metavar="PATH", help="write the report as JSON ('-' for stdout)")
+    parser.add_argument("--baseline", metavar="PATH", help="previous JSON report; exit 1 on regressions")
+    parser.add_argument("--samples", action="store_true", help="print table counts and sample rows")
+    parser.add_argument("--api", action="store_true", help="call the doubles rankings API and preview it")
+    args = parser.parse_args()
+
+    if args.samples:
+        db_counts_and_samples()
+    if args.api:
+        print("CONFIG CHECK")
+        print("API_KEY present:", bool(API_KEY))
+        print("BASE_URL:", BASE_URL)
+        print("FORMAT:", FORMAT)
+        print()
+        call_double_rankings_api()
+
+    report = profile(args.repeat)
+    if args.json == "-":
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print_report(report)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2, default=str)
+            print("Report written to", args.json)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare_to_baseline(report, json.load(f))
+        if problems:
+            print("=== REGRESSIONS ===", file=sys.stderr)
+            for p in problems:
+                print(" -", p, file=sys.stderr)
+            sys.exit(1)
+        print("No regressions against", args.baseline, file=sys.stderr)
 
 if __name__ == "__main__":
     main()
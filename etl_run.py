@@ -1,22 +1,75 @@
 # etl_run.py
+import argparse
+from config import ETL_LOAD_MODE
 from db_handler import init_db
-from fetchers.fetch_competitions import fetch_competitions, process_and_store_competitions
-from fetchers.fetch_complexes import fetch_complexes, process_and_store_complexes
-from fetchers.fetch_doubles_rankings import fetch_doubles_rankings, process_and_store_rankings
+from fetchers.fetch_competitions import fetch_competitions, parse_competitions
+from fetchers.fetch_complexes import fetch_complexes, parse_complexes
+from fetchers.fetch_doubles_rankings import fetch_doubles_rankings, parse_rankings
+from search_index import build_search_index
+from shadow_load import swap_load
+from checkpoints import (
+    start_or_resume_run, finish_run, fetch_with_checkpoint, load_batches, endpoint_done, mark_endpoint_done
+)
 
-def main():
+def _rankings_datasets(json_data):
+    competitors, rankings = parse_rankings(json_data) or ([], [])
+    return [("competitors", competitors), ("competitor_rankings", rankings)]
+
+# endpoint -> (fetch, payload -> [(table, rows), ...]); parents before children
+ENDPOINTS = [
+    ("competitions", fetch_competitions,
+     lambda j: list(zip(("categories", "competitions"), parse_competitions(j)))),
+    ("complexes", fetch_complexes,
+     lambda j: list(zip(("complexes", "venues"), parse_complexes(j)))),
+    ("doubles_rankings", fetch_doubles_rankings, _rankings_datasets),
+]
+
+def main_merge(run_id):
+    """Load each endpoint batch by batch, skipping whatever this run already committed."""
+    for endpoint, fetch, to_datasets in ENDPOINTS:
+        if endpoint_done(run_id, endpoint):
+            print(f"Skipping {endpoint} (already loaded in run {run_id}).")
+            continue
+        print(f"Fetching {endpoint}...")
+        datasets = to_datasets(fetch_with_checkpoint(run_id, endpoint, fetch))
+        loaded, skipped = load_batches(run_id, endpoint, datasets)
+        print(f"  {endpoint}: {loaded} batches loaded, {skipped} already committed")
+        mark_endpoint_done(run_id, endpoint, sum(len(rows) for _, rows in datasets))
+
+def main_swap(run_id=None):
+    """Fetch everything first, then publish it in one atomic swap."""
+    if run_id and endpoint_done(run_id, "swap"):
+        print(f"Skipping swap (already committed in run {run_id}).")
+        return
+    datasets = []
+    for endpoint, fetch, to_datasets in ENDPOINTS:
+        print(f"Fetching {endpoint}...")
+        payload = fetch_with_checkpoint(run_id, endpoint, fetch) if run_id else fetch()
+        datasets.extend(to_datasets(payload))
+    print("Loading shadow tables and swapping...")
+    counts = swap_load(datasets, run_id)
+    print("Swapped in:", counts)
+
+def main(fresh=False):
     print("Init DB...")
     init_db()
-    print("Fetching competitions...")
-    comp_json = fetch_competitions()
-    process_and_store_competitions(comp_json)
-    print("Fetching complexes...")
-    complexes_json = fetch_complexes()
-    process_and_store_complexes(complexes_json)
-    print("Fetching doubles rankings...")
-    rank_json = fetch_doubles_rankings()
-    process_and_store_rankings(rank_json)
+    run_id = start_or_resume_run(fresh=fresh)
+    try:
+        if ETL_LOAD_MODE == "swap":
+            main_swap(run_id)
+        else:
+            main_merge(run_id)
+        finish_run(run_id)
+    except Exception as e:
+        # marked failed (not left 'running') so the next invocation resumes it
+        finish_run(run_id, error=e)
+        print(f"ETL run {run_id} failed; rerun to resume from the last committed batch.")
+        raise
+    print("Building search index...")
+    build_search_index()
     print("ETL complete.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Fetch Sportradar data and load it into the DB")
+    parser.add_argument("--fresh", action="store_true", help="start a new run instead of resuming a failed one")
+    main(fresh=parser.parse_args().fresh)
@@ -4,7 +4,9 @@ from config import BASE_URL, FORMAT, API_KEY
 from sqlalchemy.exc import IntegrityError
 from db_handler import SessionLocal
 from models import Category, Competition
+from pg_bulk import use_bulk_load, bulk_load_competitions
 from tqdm import tqdm
+import changelog
 
 def fetch_competitions():
     url = f"{BASE_URL}/competitions.{FORMAT}"
@@ -13,51 +15,71 @@ def fetch_competitions():
     resp.raise_for_status()
     return resp.json()
 
+def parse_competitions(json_data):
+    """Normalise the competitions payload into (categories, competitions) lists of column dicts."""
+    # Attempt flexible parsing: look for categories and competitions
+    # Many Sportradar endpoints include a top-level "categories" and "competitions" lists.
+    categories = json_data.get("categories") or []
+    competitions = json_data.get("competitions") or json_data.get("tournaments") or []
+
+    category_rows = []
+    for c in categories:
+        cat_id = c.get("id") or c.get("category_id") or c.get("categoryId")
+        name = c.get("name") or c.get("category_name")
+        if not cat_id or not name:
+            continue
+        category_rows.append({"category_id": str(cat_id), "category_name": name})
+
+    competition_rows = []
+    for comp in competitions:
+        comp_id = comp.get("id") or comp.get("competition_id") or comp.get("id")
+        name = comp.get("name") or comp.get("competition_name") or comp.get("title")
+        parent = comp.get("parent") or comp.get("parent_id") or comp.get("parentId")
+        ctype = comp.get("type") or comp.get("competition_type") or comp.get("event_type") or "unknown"
+        gender = comp.get("gender") or comp.get("competition_gender") or "unknown"
+        category_id = None
+        # category may be nested
+        if comp.get("category"):
+            category_id = comp.get("category").get("id")
+        else:
+            category_id = comp.get("category_id") or comp.get("categoryId")
+
+        if not comp_id or not name:
+            continue
+
+        competition_rows.append({
+            "competition_id": str(comp_id),
+            "competition_name": name,
+            "parent_id": str(parent) if parent else None,
+            "type": str(ctype),
+            "gender": str(gender),
+            "category_id": str(category_id) if category_id else None,
+        })
+    return category_rows, competition_rows
+
 def process_and_store_competitions(json_data):
+    categories, competitions = parse_competitions(json_data)
+    if use_bulk_load():
+        bulk_load_competitions(categories, competitions)
+        return
+
     session = SessionLocal()
     try:
-        # Attempt flexible parsing: look for categories and competitions
-        # Many Sportradar endpoints include a top-level "categories" and "competitions" lists.
-        categories = json_data.get("categories") or []
-        competitions = json_data.get("competitions") or json_data.get("tournaments") or []
+        conn = session.connection()
+        changes = (changelog.diff_rows(conn, "categories", categories)
+                   + changelog.diff_rows(conn, "competitions", competitions))
 
         # Insert categories
-        for c in tqdm(categories, desc="categories"):
-            cat_id = c.get("id") or c.get("category_id") or c.get("categoryId")
-            name = c.get("name") or c.get("category_name")
-            if not cat_id or not name:
-                continue
-            obj = Category(category_id=str(cat_id), category_name=name)
-            session.merge(obj)  # merge avoids duplicates
-        session.commit()
+        for row in tqdm(categories, desc="categories"):
+            session.merge(Category(**row))  # merge avoids duplicates
+        session.flush()  # parents first; commit together with the change log below
 
         # Insert competitions
-        for comp in tqdm(competitions, desc="competitions"):
-            comp_id = comp.get("id") or comp.get("competition_id") or comp.get("id")
-            name = comp.get("name") or comp.get("competition_name") or comp.get("title")
-            parent = comp.get("parent") or comp.get("parent_id") or comp.get("parentId")
-            ctype = comp.get("type") or comp.get("competition_type") or comp.get("event_type") or "unknown"
-            gender = comp.get("gender") or comp.get("competition_gender") or "unknown"
-            category_id = None
-            # category may be nested
-            if comp.get("category"):
-                category_id = comp.get("category").get("id")
-            else:
-                category_id = comp.get("category_id") or comp.get("categoryId")
-
-            if not comp_id or not name:
-                continue
-
-            obj = Competition(
-                competition_id=str(comp_id),
-                competition_name=name,
-                parent_id=str(parent) if parent else None,
-                type=str(ctype),
-                gender=str(gender),
-                category_id=str(category_id) if category_id else None
-            )
-            session.merge(obj)
+        for row in tqdm(competitions, desc="competitions"):
+            session.merge(Competition(**row))
+        changelog.record_changes(session.connection(), changes)
         session.commit()
+        changelog.publish(changes)
 
     except Exception:
         session.rollback()
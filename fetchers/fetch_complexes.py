@@ -3,7 +3,9 @@ import requests
 from config import BASE_URL, FORMAT, API_KEY
 from db_handler import SessionLocal
 from models import Complex, Venue
+from pg_bulk import use_bulk_load, bulk_load_complexes
 from tqdm import tqdm
+import changelog
 
 def fetch_complexes():
     url = f"{BASE_URL}/complexes.{FORMAT}"
@@ -12,38 +14,54 @@ def fetch_complexes():
     resp.raise_for_status()
     return resp.json()
 
+def parse_complexes(json_data):
+    """Normalise the complexes payload into (complexes, venues) lists of column dicts."""
+    complex_rows, venue_rows = [], []
+    complexes = json_data.get("complexes") or []
+    for comp in complexes:
+        comp_id = comp.get("id") or comp.get("complex_id")
+        comp_name = comp.get("name") or comp.get("complex_name")
+        if not comp_id or not comp_name:
+            continue
+        complex_rows.append({"complex_id": str(comp_id), "complex_name": comp_name})
+        # venues under a complex
+        for v in comp.get("venues", []) or []:
+            venue_id = v.get("id") or v.get("venue_id")
+            venue_name = v.get("name") or v.get("venue_name")
+            city = v.get("city", {}).get("name") or v.get("city_name") or v.get("city")
+            country = v.get("country", {}).get("name") or v.get("country_name") or v.get("country")
+            country_code = v.get("country", {}).get("code") or v.get("country_code") or (country and country[:3])
+            timezone = v.get("timezone") or v.get("tz") or "unknown"
+            if not venue_id or not venue_name:
+                continue
+            venue_rows.append({
+                "venue_id": str(venue_id),
+                "venue_name": venue_name,
+                "city_name": str(city or ""),
+                "country_name": str(country or ""),
+                "country_code": str(country_code or "")[:3],
+                "timezone": str(timezone),
+                "complex_id": str(comp_id),
+            })
+    return complex_rows, venue_rows
+
 def process_and_store_complexes(json_data):
+    complexes, venues = parse_complexes(json_data)
+    if use_bulk_load():
+        bulk_load_complexes(complexes, venues)
+        return
+
     session = SessionLocal()
     try:
-        complexes = json_data.get("complexes") or []
-        for comp in tqdm(complexes, desc="complexes"):
-            comp_id = comp.get("id") or comp.get("complex_id")
-            comp_name = comp.get("name") or comp.get("complex_name")
-            if not comp_id or not comp_name:
-                continue
-            cobj = Complex(complex_id=str(comp_id), complex_name=comp_name)
-            session.merge(cobj)
-            # venues under a complex
-            for v in comp.get("venues", []) or []:
-                venue_id = v.get("id") or v.get("venue_id")
-                venue_name = v.get("name") or v.get("venue_name")
-                city = v.get("city", {}).get("name") or v.get("city_name") or v.get("city")
-                country = v.get("country", {}).get("name") or v.get("country_name") or v.get("country")
-                country_code = v.get("country", {}).get("code") or v.get("country_code") or (country and country[:3])
-                timezone = v.get("timezone") or v.get("tz") or "unknown"
-                if not venue_id or not venue_name:
-                    continue
-                vobj = Venue(
-                    venue_id=str(venue_id),
-                    venue_name=venue_name,
-                    city_name=str(city or ""),
-                    country_name=str(country or ""),
-                    country_code=str(country_code or "")[:3],
-                    timezone=str(timezone),
-                    complex_id=str(comp_id)
-                )
-                session.merge(vobj)
+        conn = session.connection()
+        changes = changelog.diff_rows(conn, "complexes", complexes) + changelog.diff_rows(conn, "venues", venues)
+        for row in tqdm(complexes, desc="complexes"):
+            session.merge(Complex(**row))
+        for row in tqdm(venues, desc="venues"):
+            session.merge(Venue(**row))
+        changelog.record_changes(session.connection(), changes)
         session.commit()
+        changelog.publish(changes)
     except Exception:
         session.rollback()
         raise
@@ -0,0 +1,114 @@
+# loadtest.py
+"""
+Load test for api_server.py against a local DB.
+
+    python api_server.py --port 8080 &
+    python loadtest.py --url http://127.0.0.1:8080 --concurrency 32 --requests 5000
+    python loadtest.py --conditional   # replay ETags to measure the 304 path
+
+Each worker keeps one keep-alive connection open and cycles through the endpoints.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = [
+    "/api/top5_competitors",
+    "/api/competitors_with_rank_and_points?page=1&page_size=100",
+    "/api/competitions_with_category?page=1&page_size=100",
+    "/api/count_competitions_by_category",
+    "/api/venues_with_complex_name",
+    "/api/highest_points_current_week",
+    "/api/stable_rank_competitors",
+    "/api/venues_grouped_by_country",
+]
+
+
+async def fetch(reader, writer, host, path, headers):
+    lines = [f"GET {path} HTTP/1.1", f"Host: {host}", "Accept-Encoding: gzip"]
+    lines.extend(f"{k}: {v}" for k, v in headers.items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    status = int(status_line.split(" ")[1])
+    resp_headers = {}
+    for line in header_lines:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            resp_headers[k.strip().lower()] = v.strip()
+    length = int(resp_headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    return status, resp_headers, len(body)
+
+
+async def worker(url, paths, n_requests, conditional, results):
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    etags = {}
+    try:
+        for i in range(n_requests):
+            path = paths[i % len(paths)]
+            headers = {"If-None-Match": etags[path]} if conditional and path in etags else {}
+            start = time.perf_counter()
+            status, resp_headers, size = await fetch(reader, writer, parts.netloc, path, headers)
+            results.append((time.perf_counter() - start, status, size))
+            if "etag" in resp_headers:
+                etags[path] = resp_headers["etag"]
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+async def run(args):
+    paths = args.paths or DEFAULT_PATHS
+    per_worker = max(1, args.requests // args.concurrency)
+    results = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(args.url, paths, per_worker, args.conditional, results) for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    report = {
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "conditional": args.conditional,
+        "requests": len(results),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(results) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "status_counts": dict(Counter(r[1] for r in results)),
+        "bytes_received": sum(r[2] for r in results),
+    }
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the JSON API server")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="total requests across all workers")
+    parser.add_argument("--conditional", action="store_true", help="send If-None-Match with the last ETag seen")
+    parser.add_argument("--path", dest="paths", action="append", help="endpoint path (repeatable)")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
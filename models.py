@@ -1,6 +1,6 @@
 # models.py
 from sqlalchemy import (
-    Column, Integer, String, ForeignKey, Text
+    Column, Integer, String, ForeignKey, Text, DateTime
 )
 from sqlalchemy.orm import declarative_base, relationship
 
@@ -57,3 +57,39 @@ class CompetitorRanking(Base):
     competitions_played = Column(Integer, nullable=False)
     competitor_id = Column(String(50), ForeignKey("competitors.competitor_id"))
     competitor = relationship("Competitor", back_populates="rankings")
+
+# --- ETL bookkeeping
+class EtlRun(Base):
+    __tablename__ = "etl_runs"
+    run_id = Column(Integer, primary_key=True, autoincrement=True)
+    status = Column(String(20), nullable=False)  # running | failed | complete
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+    checkpoints = relationship("EtlCheckpoint", back_populates="run")
+
+class EtlCheckpoint(Base):
+    __tablename__ = "etl_checkpoints"
+    checkpoint_id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(Integer, ForeignKey("etl_runs.run_id"), nullable=False)
+    endpoint = Column(String(50), nullable=False)
+    step = Column(String(10), nullable=False)  # fetch | load | done
+    dataset = Column(String(50), nullable=True)
+    batch_no = Column(Integer, nullable=False, default=0)
+    idempotency_key = Column(String(120), nullable=False, unique=True)
+    row_count = Column(Integer, nullable=False, default=0)
+    payload = Column(Text, nullable=True)  # raw API response for fetch checkpoints
+    created_at = Column(DateTime, nullable=False)
+    run = relationship("EtlRun", back_populates="checkpoints")
+
+class ChangeLogEntry(Base):
+    """Append-only change-data-capture log written by the loaders (see changelog.py)."""
+    __tablename__ = "change_log"
+    change_id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(Integer, ForeignKey("etl_runs.run_id"), nullable=True)
+    table_name = Column(String(50), nullable=False)
+    op = Column(String(10), nullable=False)  # insert | update | delete
+    row_key = Column(String(50), nullable=False)
+    old_values = Column(Text, nullable=True)  # JSON
+    new_values = Column(Text, nullable=True)  # JSON
+    changed_at = Column(DateTime, nullable=False)
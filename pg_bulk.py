@@ -0,0 +1,149 @@
+# pg_bulk.py
+"""
+PostgreSQL bulk load path for the ETL loaders.
+
+Normalised records are streamed with COPY ... FROM STDIN into temp staging
+tables and merged into the real tables with set-based INSERT ... ON CONFLICT,
+all in one transaction. Other dialects (SQLite) keep the ORM merge path.
+
+Try it against a local Postgres (needs psycopg2 or psycopg 3):
+
+    createdb tennis
+    DATABASE_URL=postgresql+psycopg2://localhost/tennis python etl_run.py
+"""
+from sqlalchemy import text
+from db_handler import engine
+import changelog
+
+COPY_CHUNK_ROWS = 5000
+
+# table -> (primary key, columns in COPY order); rankings are append-only so they have no key
+TABLES = {
+    "categories": ("category_id", ["category_id", "category_name"]),
+    "competitions": ("competition_id",
+                     ["competition_id", "competition_name", "parent_id", "type", "gender", "category_id"]),
+    "complexes": ("complex_id", ["complex_id", "complex_name"]),
+    "venues": ("venue_id",
+               ["venue_id", "venue_name", "city_name", "country_name", "country_code", "timezone", "complex_id"]),
+    "competitors": ("competitor_id", ["competitor_id", "name", "country", "country_code", "abbreviation"]),
+    "competitor_rankings": (None, ["rank", "movement", "points", "competitions_played", "competitor_id"]),
+}
+
+
+def use_bulk_load():
+    return engine.dialect.name == "postgresql"
+
+
+def _copy_value(value):
+    # COPY text format: \\N for NULL, backslash-escape the delimiter/line characters
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _copy_chunks(rows, columns):
+    """Yield COPY text-format chunks, each row prefixed by its position (_seq)."""
+    buf = []
+    for seq, row in enumerate(rows):
+        buf.append(str(seq) + "\t" + "\t".join(_copy_value(row.get(c)) for c in columns) + "\n")
+        if len(buf) >= COPY_CHUNK_ROWS:
+            yield "".join(buf)
+            buf = []
+    if buf:
+        yield "".join(buf)
+
+
+class _ChunkReader:
+    """File-like wrapper so psycopg2's copy_expert can pull from a generator."""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._pending = ""
+
+    def read(self, size=-1):
+        while size < 0 or len(self._pending) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._pending += chunk
+        if size < 0:
+            out, self._pending = self._pending, ""
+        else:
+            out, self._pending = self._pending[:size], self._pending[size:]
+        return out
+
+
+def _copy_into(conn, stage, columns, rows):
+    sql = f"COPY {stage} (_seq, {', '.join(columns)}) FROM STDIN"
+    dbapi_conn = conn.connection.dbapi_connection
+    with dbapi_conn.cursor() as cur:
+        if hasattr(cur, "copy_expert"):  # psycopg2
+            cur.copy_expert(sql, _ChunkReader(_copy_chunks(rows, columns)))
+        else:  # psycopg 3
+            with cur.copy(sql) as copy:
+                for chunk in _copy_chunks(rows, columns):
+                    copy.write(chunk)
+
+
+def stage_rows(conn, table, rows):
+    """Create a temp staging table shaped like `table` and COPY `rows` into it. Returns its name."""
+    _, columns = TABLES[table]
+    stage = f"_stage_{table}"
+    conn.execute(text(f"DROP TABLE IF EXISTS {stage}"))
+    conn.execute(text(
+        f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+        f"SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
+    ))
+    conn.execute(text(f"ALTER TABLE {stage} ADD COLUMN _seq integer"))
+    _copy_into(conn, stage, columns, rows)
+    return stage
+
+
+def merge_staged(conn, table, stage, target=None):
+    """
+    Upsert staged rows into `table` (last occurrence of a key wins, like session.merge).
+    `target` redirects the merge into another table of the same shape (e.g. a shadow table).
+    """
+    key, columns = TABLES[table]
+    target = target or table
+    cols = ", ".join(columns)
+    if key is None:
+        result = conn.execute(text(f"INSERT INTO {target} ({cols}) SELECT {cols} FROM {stage} ORDER BY _seq"))
+        return result.rowcount
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c != key)
+    result = conn.execute(text(
+        f"INSERT INTO {target} ({cols}) "
+        f"SELECT DISTINCT ON ({key}) {cols} FROM {stage} ORDER BY {key}, _seq DESC "
+        f"ON CONFLICT ({key}) DO UPDATE SET {updates}"
+    ))
+    return result.rowcount
+
+
+def bulk_load(datasets):
+    """Stage and merge [(table, rows), ...] in order, in a single transaction. Returns {table: rowcount}."""
+    counts, changes = {}, []
+    with engine.begin() as conn:
+        for table, rows in datasets:
+            if not rows:
+                counts[table] = 0
+                continue
+            changes.extend(changelog.diff_rows(conn, table, rows))
+            stage = stage_rows(conn, table, rows)
+            counts[table] = merge_staged(conn, table, stage)
+        changelog.record_changes(conn, changes)
+    changelog.publish(changes)
+    return counts
+
+
+def bulk_load_competitions(categories, competitions):
+    return bulk_load([("categories", categories), ("competitions", competitions)])
+
+
+def bulk_load_complexes(complexes, venues):
+    return bulk_load([("complexes", complexes), ("venues", venues)])
+
+
+def bulk_load_rankings(competitors, rankings):
+    counts = bulk_load([("competitors", competitors), ("competitor_rankings", rankings)])
+    return counts["competitor_rankings"]
@@ -9,6 +9,20 @@ def run_query(sql, params=None):
         df = pd.DataFrame(result.mappings().all())
     return df
 
+def data_generation():
+    """
+    Cheap fingerprint of the loaded data. Every load path logs its inserts and updates
+    to change_log in the same transaction, and appends ranking rows, so the pair moves
+    whenever any loaded table changes.
+    """
+    sql = """
+    SELECT (SELECT COALESCE(MAX(change_id), 0) FROM change_log) AS last_change_id,
+           (SELECT COALESCE(MAX(rank_id), 0) FROM competitor_rankings) AS last_rank_id;
+    """
+    with engine.connect() as conn:
+        row = conn.execute(text(sql)).mappings().first()
+    return f"{row['last_change_id']}-{row['last_rank_id']}"
+
 # 1. List all competitions along with their category name
 def competitions_with_category():
     sql = """
@@ -171,3 +185,13 @@ def highest_points_current_week():
     LIMIT 1;
     """
     return run_query(sql)
+
+# --- Change feed (written by the loaders, see changelog.py)
+def changes_since(last_change_id):
+    sql = """
+    SELECT change_id, run_id, table_name, op, row_key, old_values, new_values, changed_at
+    FROM change_log
+    WHERE change_id > :last_change_id
+    ORDER BY change_id;
+    """
+    return run_query(sql, {"last_change_id": int(last_change_id)})
@@ -0,0 +1,148 @@
+# rankings_engine.py
+import threading
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from db_handler import engine
+from queries import data_generation
+
+# Latest ranking row per competitor (rankings are appended on every ETL run)
+LATEST_RANKINGS_SQL = """
+SELECT comp.competitor_id, comp.name, comp.country, comp.country_code, comp.abbreviation,
+       cr.rank, cr.points, cr.movement, cr.competitions_played
+FROM competitor_rankings cr
+JOIN competitors comp ON comp.competitor_id = cr.competitor_id
+WHERE cr.rank_id IN (SELECT MAX(rank_id) FROM competitor_rankings GROUP BY competitor_id)
+ORDER BY cr.rank;
+"""
+
+
+class RankingsSnapshot:
+    """
+    Columnar, read-only view of the latest doubles rankings.
+    Numeric columns are NumPy arrays; country and name are dictionary encoded
+    (`countries[country_codes[i]]` is the country of row i).
+    """
+
+    def __init__(self, rows, generation=None):
+        self.generation = generation
+        self.competitor_id = np.array([r["competitor_id"] for r in rows], dtype=object)
+        self.country_code = np.array([r["country_code"] or "" for r in rows], dtype=object)
+        self.abbreviation = np.array([r["abbreviation"] for r in rows], dtype=object)
+        self.rank = np.array([r["rank"] for r in rows], dtype=np.int64)
+        self.points = np.array([r["points"] for r in rows], dtype=np.int64)
+        self.movement = np.array([r["movement"] for r in rows], dtype=np.int64)
+        self.competitions_played = np.array([r["competitions_played"] for r in rows], dtype=np.int64)
+
+        self.countries, self.country_codes = self._encode([r["country"] or "" for r in rows])
+        self.names, self.name_codes = self._encode([r["name"] or "" for r in rows])
+        self._country_lookup = {c.lower(): i for i, c in enumerate(self.countries)}
+
+    @staticmethod
+    def _encode(values):
+        if not values:
+            return np.array([], dtype=object), np.array([], dtype=np.int32)
+        uniques, codes = np.unique(np.array(values, dtype=object), return_inverse=True)
+        return uniques, codes.astype(np.int32)
+
+    def __len__(self):
+        return len(self.rank)
+
+    def country_code_for(self, country_name):
+        """Dictionary code for a country name (case-insensitive), or -1 if unknown."""
+        return self._country_lookup.get((country_name or "").strip().lower(), -1)
+
+    def frame(self, idx=None, columns=("rank", "points", "movement", "competitions_played")):
+        """Materialise rows `idx` (all rows if None) as a DataFrame."""
+        if idx is None:
+            idx = np.arange(len(self))
+        data = {
+            "competitor_id": self.competitor_id[idx],
+            "name": self.names[self.name_codes[idx]],
+            "country": self.countries[self.country_codes[idx]],
+            "country_code": self.country_code[idx],
+            "abbreviation": self.abbreviation[idx],
+        }
+        for col in columns:
+            data[col] = getattr(self, col)[idx]
+        return pd.DataFrame(data)
+
+    # --- vectorised selections (return row indices)
+    def top_k_by_rank(self, k=5):
+        if len(self) == 0:
+            return np.array([], dtype=np.int64)
+        k = min(k, len(self))
+        idx = np.argpartition(self.rank, k - 1)[:k]
+        return idx[np.argsort(self.rank[idx], kind="stable")]
+
+    def top_k_by_points(self, k=1):
+        if len(self) == 0:
+            return np.array([], dtype=np.int64)
+        k = min(k, len(self))
+        idx = np.argpartition(-self.points, k - 1)[:k]
+        return idx[np.argsort(-self.points[idx], kind="stable")]
+
+    def ranked_at_most(self, max_rank):
+        """Every row with rank <= max_rank (ties and all ranking groups included), by rank."""
+        idx = self.where(self.rank <= max_rank)
+        return idx[np.argsort(self.rank[idx], kind="stable")]
+
+    def where(self, mask):
+        return np.flatnonzero(mask)
+
+    # --- aggregations
+    def points_by_country(self):
+        """Total points per country, highest first."""
+        totals = np.bincount(self.country_codes, weights=self.points, minlength=len(self.countries))
+        order = np.argsort(-totals, kind="stable")
+        return pd.DataFrame({"country": self.countries[order], "total_points": totals[order].astype(np.int64)})
+
+    def total_points_for_country(self, country_name):
+        code = self.country_code_for(country_name)
+        if code < 0:
+            return pd.DataFrame(columns=["country", "total_points"])
+        total = int(self.points[self.country_codes == code].sum())
+        return pd.DataFrame({"country": [self.countries[code]], "total_points": [total]})
+
+    def rank_histogram(self, bin_size=50):
+        """Number of competitors per rank bucket of width `bin_size`."""
+        if len(self) == 0:
+            return pd.DataFrame(columns=["rank_from", "rank_to", "competitors"])
+        buckets = (self.rank - 1) // bin_size
+        counts = np.bincount(buckets)
+        starts = np.arange(len(counts)) * bin_size + 1
+        keep = counts > 0
+        return pd.DataFrame({
+            "rank_from": starts[keep],
+            "rank_to": starts[keep] + bin_size - 1,
+            "competitors": counts[keep],
+        })
+
+    # --- dashboard widgets (same shape as the matching queries.py functions)
+    def top5_competitors(self):
+        return self.frame(self.ranked_at_most(5), columns=("rank", "points"))
+
+    def stable_rank_competitors(self):
+        return self.frame(self.where(self.movement == 0), columns=("rank", "movement"))
+
+    def highest_points_current_week(self):
+        return self.frame(self.top_k_by_points(1), columns=("rank", "points"))
+
+
+def load_snapshot(generation=None):
+    with engine.connect() as conn:
+        rows = conn.execute(text(LATEST_RANKINGS_SQL)).mappings().all()
+    return RankingsSnapshot(rows, generation=generation)
+
+
+_lock = threading.Lock()
+_snapshot = None
+
+def get_snapshot():
+    """Return the cached snapshot, rebuilding it only when the data generation changed."""
+    global _snapshot
+    generation = data_generation()
+    with _lock:
+        if _snapshot is None or _snapshot.generation != generation:
+            _snapshot = load_snapshot(generation)
+        return _snapshot
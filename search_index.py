@@ -0,0 +1,201 @@
+# search_index.py
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from db_handler import engine
+from queries import data_generation
+
+FTS_TABLE = "name_search"
+FTS_META_TABLE = "name_search_meta"  # data_generation() the FTS table was built from
+
+# (kind, SQL returning ref_id + name) for every searchable entity
+SOURCES = [
+    ("competitor", "SELECT competitor_id AS ref_id, name FROM competitors"),
+    ("competition", "SELECT competition_id AS ref_id, competition_name AS name FROM competitions"),
+    ("venue", "SELECT venue_id AS ref_id, venue_name AS name FROM venues"),
+    ("complex", "SELECT complex_id AS ref_id, complex_name AS name FROM complexes"),
+    ("category", "SELECT category_id AS ref_id, category_name AS name FROM categories"),
+    ("country", "SELECT DISTINCT country AS ref_id, country AS name FROM competitors "
+                "UNION SELECT DISTINCT country_name, country_name FROM venues"),
+    # countries that have at least one venue (for venue lookups)
+    ("venue_country", "SELECT DISTINCT country_name AS ref_id, country_name AS name FROM venues"),
+]
+
+RESULT_COLUMNS = ["kind", "ref_id", "name", "score"]
+
+
+# Letters NFKD does not decompose into a base letter + combining mark
+TRANSLITERATE = str.maketrans({
+    "ł": "l", "ø": "o", "ß": "ss", "æ": "ae", "œ": "oe", "đ": "d", "ð": "d", "þ": "th",
+    "ı": "i", "ħ": "h", "ŧ": "t", "ŋ": "n", "ĸ": "k", "ſ": "s",
+})
+
+
+def fold(value):
+    """Lower-case, strip accents and collapse punctuation so 'São  Paulo' == 'sao paulo'."""
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    value = value.lower().translate(TRANSLITERATE)
+    return re.sub(r"[^0-9a-z]+", " ", value).strip()
+
+
+def trigrams(folded):
+    padded = f"  {folded} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_entries(conn):
+    entries = []
+    for kind, sql in SOURCES:
+        for row in conn.execute(text(sql)).mappings():
+            if row["name"]:
+                entries.append((kind, str(row["ref_id"]), row["name"]))
+    return entries
+
+
+class TrigramIndex:
+    """In-process trigram index with prefix boost; used when FTS5 is not available."""
+
+    def __init__(self, entries, generation=None):
+        self.generation = generation
+        self.entries = entries
+        self.folded = [fold(name) for _, _, name in entries]
+        self.postings = defaultdict(list)
+        self.sizes = []
+        for i, f in enumerate(self.folded):
+            grams = trigrams(f)
+            self.sizes.append(len(grams))
+            for g in grams:
+                self.postings[g].append(i)
+
+    def search(self, query, kinds=None, limit=20, min_score=0.3):
+        q = fold(query)
+        if not q:
+            return []
+        q_grams = trigrams(q)
+        shared = defaultdict(int)
+        for g in q_grams:
+            for i in self.postings.get(g, ()):
+                shared[i] += 1
+        hits = []
+        for i, n in shared.items():
+            kind, ref_id, name = self.entries[i]
+            if kinds and kind not in kinds:
+                continue
+            # Dice coefficient over trigrams, boosted for word-prefix matches
+            score = 2.0 * n / (len(q_grams) + self.sizes[i])
+            f = self.folded[i]
+            if f.startswith(q) or f" {q}" in f:
+                score += 1.0
+            if score >= min_score:
+                hits.append((kind, ref_id, name, round(score, 4)))
+        hits.sort(key=lambda h: (-h[3], h[2]))
+        return hits[:limit]
+
+
+def fts_available():
+    return engine.dialect.name == "sqlite"
+
+
+def build_search_index():
+    """
+    (Re)build the name search index. Called at the end of an ETL run.
+    On SQLite this materialises an FTS5 table; otherwise only the in-process index is warmed.
+    """
+    generation = data_generation()
+    with engine.begin() as conn:
+        entries = load_entries(conn)
+        if fts_available():
+            try:
+                conn.execute(text(f"DROP TABLE IF EXISTS {FTS_META_TABLE}"))
+                conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                    "kind UNINDEXED, ref_id UNINDEXED, name UNINDEXED, folded, "
+                    "tokenize = 'unicode61 remove_diacritics 2')"
+                ))
+                conn.execute(
+                    text(f"INSERT INTO {FTS_TABLE} (kind, ref_id, name, folded) VALUES (:kind, :ref_id, :name, :folded)"),
+                    [{"kind": k, "ref_id": r, "name": n, "folded": fold(n)} for k, r, n in entries],
+                )
+                conn.execute(text(f"CREATE TABLE {FTS_META_TABLE} (generation TEXT NOT NULL)"))
+                conn.execute(text(f"INSERT INTO {FTS_META_TABLE} (generation) VALUES (:g)"), {"g": generation})
+            except OperationalError as e:
+                # SQLite built without FTS5
+                print("FTS5 unavailable, using in-process trigram index:", e)
+    _set_trigram_index(TrigramIndex(entries, generation))
+    return len(entries)
+
+
+_lock = threading.Lock()
+_trigram_index = None
+
+def _set_trigram_index(index):
+    global _trigram_index
+    with _lock:
+        _trigram_index = index
+
+def get_trigram_index(generation=None):
+    generation = generation or data_generation()
+    with _lock:
+        index = _trigram_index
+    if index is None or index.generation != generation:
+        with engine.connect() as conn:
+            index = TrigramIndex(load_entries(conn), generation)
+        _set_trigram_index(index)
+    return index
+
+
+def _fts_generation(conn):
+    """Generation the FTS table was built from, or None if it (or its meta row) is missing."""
+    tables = {r[0] for r in conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN (:fts, :meta)"
+    ), {"fts": FTS_TABLE, "meta": FTS_META_TABLE})}
+    if tables != {FTS_TABLE, FTS_META_TABLE}:
+        return None
+    return conn.execute(text(f"SELECT generation FROM {FTS_META_TABLE}")).scalar()
+
+
+def _fts_search(query, kinds, limit, generation):
+    """FTS5 hits, or None when the table is missing or was built from an older generation."""
+    tokens = fold(query).split()
+    if not tokens:
+        return []
+    # every token must match as a prefix; bm25 gives the ranking (lower is better)
+    match = " ".join(f'"{t}"*' for t in tokens)
+    sql = f"SELECT kind, ref_id, name, -bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+    params = {"match": match, "limit": limit}
+    if kinds:
+        placeholders = ", ".join(f":k{i}" for i in range(len(kinds)))
+        sql += f" AND kind IN ({placeholders})"
+        params.update({f"k{i}": k for i, k in enumerate(kinds)})
+    sql += " ORDER BY bm25(" + FTS_TABLE + "), name LIMIT :limit"
+    with engine.connect() as conn:
+        if _fts_generation(conn) != generation:
+            return None
+        rows = conn.execute(text(sql), params).all()
+    return [(r.kind, r.ref_id, r.name, round(r.score, 4)) for r in rows]
+
+
+def search(query, kinds=None, limit=20):
+    """
+    Ranked prefix/fuzzy name lookup.
+    Uses the FTS5 table for prefix matches and falls back to the trigram index
+    for fuzzy (typo / partial) matches, when FTS5 is not available or when the
+    FTS5 table is older than the loaded data.
+    """
+    kinds = list(kinds) if kinds else None
+    generation = data_generation()
+    hits = None
+    if fts_available():
+        try:
+            hits = _fts_search(query, kinds, limit, generation)
+        except OperationalError:
+            hits = None
+    if not hits:
+        hits = get_trigram_index(generation).search(query, kinds=kinds, limit=limit)
+    return pd.DataFrame(hits, columns=RESULT_COLUMNS)
@@ -0,0 +1,183 @@
+# shadow_load.py
+"""
+Swap load mode (ETL_LOAD_MODE=swap).
+
+Each table is rebuilt as <table>__shadow (current rows + this run's records),
+validated there (row counts, foreign keys) and then swapped in with renames
+inside one short transaction. Readers keep querying the previous version
+until the swap commits.
+"""
+from datetime import datetime, timezone
+from sqlalchemy import MetaData, Table, Column, ForeignKey, text, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from db_handler import engine
+from models import Base, EtlCheckpoint
+import pg_bulk
+import changelog
+
+SHADOW_SUFFIX = "__shadow"
+OLD_SUFFIX = "__old"
+
+# Tables rebuilt by a swap load, parents before children
+SWAP_TABLES = [t for t in Base.metadata.sorted_tables if t.name in pg_bulk.TABLES]
+
+# child table -> [(fk column, parent table, parent key)]
+FOREIGN_KEYS = {
+    t.name: [(fk.parent.name, fk.column.table.name, fk.column.name) for fk in t.foreign_keys]
+    for t in SWAP_TABLES
+}
+
+
+class ShadowValidationError(Exception):
+    pass
+
+
+def shadow_name(table_name):
+    return table_name + SHADOW_SUFFIX
+
+
+def shadow_table(table, metadata):
+    """Copy of `table` named <table>__shadow whose foreign keys point at the other shadow tables."""
+    columns = []
+    for c in table.columns:
+        fks = [ForeignKey(f"{shadow_name(fk.column.table.name)}.{fk.column.name}") for fk in c.foreign_keys]
+        columns.append(Column(c.name, c.type, *fks, primary_key=c.primary_key,
+                              nullable=c.nullable, autoincrement=c.autoincrement))
+    return Table(shadow_name(table.name), metadata, *columns)
+
+
+def _begin(conn):
+    # pysqlite does not open a transaction for DDL on its own; make the swap atomic
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def create_shadows():
+    """(Re)create every shadow table as a copy of its live table. Returns {name: shadow Table}."""
+    metadata = MetaData()
+    shadows = {t.name: shadow_table(t, metadata) for t in SWAP_TABLES}
+    with engine.begin() as conn:
+        for t in reversed(SWAP_TABLES):
+            conn.execute(text(f"DROP TABLE IF EXISTS {shadow_name(t.name)}"))
+        metadata.create_all(conn)
+        for t in SWAP_TABLES:
+            cols = ", ".join(c.name for c in t.columns)
+            conn.execute(text(f"INSERT INTO {shadow_name(t.name)} ({cols}) SELECT {cols} FROM {t.name}"))
+        if conn.dialect.name == "postgresql":
+            # copied rows carry explicit rank_ids; move the shadow's serial past them
+            shadow = shadow_name("competitor_rankings")
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{shadow}', 'rank_id'), "
+                f"COALESCE(MAX(rank_id), 0) + 1, false) FROM {shadow}"
+            ))
+    return shadows
+
+
+def _upsert_rows(conn, table, shadow, rows):
+    key, columns = pg_bulk.TABLES[table]
+    if conn.dialect.name == "postgresql":
+        stage = pg_bulk.stage_rows(conn, table, rows)
+        return pg_bulk.merge_staged(conn, table, stage, target=shadow.name)
+    if key is None:
+        conn.execute(shadow.insert(), [{c: r.get(c) for c in columns} for r in rows])
+        return len(rows)
+    # last occurrence of a key wins, like session.merge
+    latest = {r[key]: {c: r.get(c) for c in columns} for r in rows}
+    stmt = sqlite_insert(shadow)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key], set_={c: stmt.excluded[c] for c in columns if c != key}
+    )
+    conn.execute(stmt, list(latest.values()))
+    return len(latest)
+
+
+def load_shadows(shadows, datasets):
+    with engine.begin() as conn:
+        for table, rows in datasets:
+            if rows:
+                _upsert_rows(conn, table, shadows[table], rows)
+
+
+def _count(conn, table_name):
+    return conn.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar_one()
+
+
+def validate_shadows(datasets):
+    """Check row counts and foreign keys in the shadow tables; raises ShadowValidationError."""
+    problems = []
+    new_rows = dict(datasets)
+    with engine.connect() as conn:
+        for t in SWAP_TABLES:
+            key, _ = pg_bulk.TABLES[t.name]
+            live, shadow = _count(conn, t.name), _count(conn, shadow_name(t.name))
+            rows = new_rows.get(t.name) or []
+            if key is None:
+                expected_min = live + len(rows)
+                if shadow != expected_min:
+                    problems.append(f"{t.name}: expected {expected_min} rows, shadow has {shadow}")
+            else:
+                expected_min = max(live, len({r[key] for r in rows}))
+                if shadow < expected_min:
+                    problems.append(f"{t.name}: shadow has {shadow} rows, expected at least {expected_min}")
+            for col, parent, parent_key in FOREIGN_KEYS[t.name]:
+                orphans = conn.execute(text(
+                    f"SELECT COUNT(*) FROM {shadow_name(t.name)} c "
+                    f"LEFT JOIN {shadow_name(parent)} p ON c.{col} = p.{parent_key} "
+                    f"WHERE c.{col} IS NOT NULL AND p.{parent_key} IS NULL"
+                )).scalar_one()
+                if orphans:
+                    problems.append(f"{t.name}.{col}: {orphans} rows reference missing {parent}")
+    if problems:
+        raise ShadowValidationError("; ".join(problems))
+
+
+def swap_done_key(run_id):
+    return f"{run_id}:swap:done"
+
+
+def swap_in(changes=(), run_id=None):
+    """
+    Atomically replace every live table with its shadow. `changes` and, for a checkpointed
+    run, the swap's done checkpoint are written in the same transaction, so a resumed run
+    never swaps the same payload in twice.
+    """
+    with engine.begin() as conn:
+        _begin(conn)
+        changelog.record_changes(conn, list(changes), run_id)
+        if run_id is not None:
+            conn.execute(insert(EtlCheckpoint.__table__), {
+                "run_id": run_id, "endpoint": "swap", "step": "done", "batch_no": 0,
+                "idempotency_key": swap_done_key(run_id), "row_count": len(changes),
+                "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+            })
+        for t in SWAP_TABLES:
+            conn.execute(text(f"ALTER TABLE {t.name} RENAME TO {t.name}{OLD_SUFFIX}"))
+        for t in SWAP_TABLES:
+            conn.execute(text(f"ALTER TABLE {shadow_name(t.name)} RENAME TO {t.name}"))
+        for t in reversed(SWAP_TABLES):
+            conn.execute(text(f"DROP TABLE {t.name}{OLD_SUFFIX}"))
+
+
+def drop_shadows():
+    with engine.begin() as conn:
+        for t in reversed(SWAP_TABLES):
+            conn.execute(text(f"DROP TABLE IF EXISTS {shadow_name(t.name)}"))
+
+
+def swap_load(datasets, run_id=None):
+    """
+    Load [(table, rows), ...] into shadow copies and swap them in atomically.
+    On validation failure the shadows are dropped and the live tables are untouched.
+    """
+    with engine.connect() as conn:
+        changes = [c for table, rows in datasets for c in changelog.diff_rows(conn, table, rows)]
+    shadows = create_shadows()
+    try:
+        load_shadows(shadows, datasets)
+        validate_shadows(datasets)
+    except Exception:
+        drop_shadows()
+        raise
+    swap_in(changes, run_id)
+    changelog.publish(changes)
+    return {table: len(rows or []) for table, rows in datasets}
@@ -13,6 +13,9 @@ init_db()
 from fetchers.fetch_competitions import fetch_competitions, process_and_store_competitions
 from fetchers.fetch_complexes import fetch_complexes, process_and_store_complexes
 from fetchers.fetch_doubles_rankings import fetch_doubles_rankings, process_and_store_rankings
+from search_index import build_search_index, search
+from config import ETL_LOAD_MODE
+from etl_run import main_swap
 
 # Queries import (after db init)
 try:
@@ -26,6 +29,7 @@ try:
         total_points_by_country, count_competitors_per_country, highest_points_current_week,
         run_query
     )
+    from rankings_engine import get_snapshot
 except Exception as e:
     queries_import_error = e
 else:
@@ -54,6 +58,18 @@ def db_counts():
         if session:
             session.close()
 
+def search_box(label, kinds, key):
+    """Text box backed by the name search index; returns the chosen name or None."""
+    q = st.text_input(label, "", key=f"{key}_q")
+    if not q:
+        return None
+    hits = search(q, kinds=kinds, limit=20)
+    if hits.empty:
+        st.info("No matches.")
+        return None
+    names = list(dict.fromkeys(hits["name"]))
+    return st.selectbox("Matches", names, key=f"{key}_pick")
+
 # ========== Admin sidebar (ETL) ==========
 st.set_page_config(layout="wide", page_title="Sportradar Tennis Explorer")
 
@@ -66,33 +82,49 @@ except Exception:
 st.sidebar.markdown(f"**DB Status:**\n- Competitions: {c_comp}\n- Venues: {c_ven}\n- Rankings: {c_rank}")
 
 if st.sidebar.button("Run initial ETL (fetch & populate DB)"):
-    # Run ETL sequentially and show success/errors
-    with st.spinner("Running ETL — fetching competitions..."):
+    if ETL_LOAD_MODE == "swap":
+        # Load everything into shadow tables; readers see the old data until the swap
+        with st.spinner("Running ETL — loading shadow tables and swapping..."):
+            try:
+                main_swap()
+                st.success("Competitions, complexes & rankings swapped in.")
+            except Exception as e:
+                st.error(f"ETL failed (live tables unchanged): {e}")
+                st.stop()
+    else:
+        # Run ETL sequentially and show success/errors
+        with st.spinner("Running ETL — fetching competitions..."):
+            try:
+                j = fetch_competitions()
+                process_and_store_competitions(j)
+                st.success("Competitions fetched & stored.")
+            except Exception as e:
+                st.error(f"Competitions ETL failed: {e}")
+                st.stop()
+
+        with st.spinner("Fetching complexes..."):
+            try:
+                j = fetch_complexes()
+                process_and_store_complexes(j)
+                st.success("Complexes fetched & stored.")
+            except Exception as e:
+                st.error(f"Complexes ETL failed: {e}")
+                st.stop()
+
+        with st.spinner("Fetching doubles rankings..."):
+            try:
+                j = fetch_doubles_rankings()
+                process_and_store_rankings(j)
+                st.success("Rankings fetched & stored.")
+            except Exception as e:
+                st.error(f"Rankings ETL failed: {e}")
+                st.stop()
+
+    with st.spinner("Building search index..."):
         try:
-            j = fetch_competitions()
-            process_and_store_competitions(j)
-            st.success("Competitions fetched & stored.")
+            build_search_index()
         except Exception as e:
-            st.error(f"Competitions ETL failed: {e}")
-            st.stop()
-
-    with st.spinner("Fetching complexes..."):
-        try:
-            j = fetch_complexes()
-            process_and_store_complexes(j)
-            st.success("Complexes fetched & stored.")
-        except Exception as e:
-            st.error(f"Complexes ETL failed: {e}")
-            st.stop()
-
-    with st.spinner("Fetching doubles rankings..."):
-        try:
-            j = fetch_doubles_rankings()
-            process_and_store_rankings(j)
-            st.success("Rankings fetched & stored.")
-        except Exception as e:
-            st.error(f"Rankings ETL failed: {e}")
-            st.stop()
+            st.warning(f"Search index build failed (search falls back to in-process index): {e}")
 
     st.balloons()
     # ✅ Safe fallback instead of st.experimental_rerun()
@@ -169,6 +201,16 @@ elif menu == "Competitions":
     st.subheader("Parent & sub-competitions")
     st.dataframe(parent_and_subcompetitions())
 
+    st.subheader("Search competitions")
+    competition_q = st.text_input("Competition name", "", key="competition_q")
+    if competition_q:
+        st.dataframe(search(competition_q, kinds=["competition"]))
+
+    st.subheader("Competitions in category")
+    category_name = search_box("Category name", ["category"], "category")
+    if category_name:
+        st.dataframe(competitions_in_category(category_name))
+
 # ---------- Complexes & Venues ----------
 elif menu == "Complexes & Venues":
     st.header("Complexes & Venues")
@@ -178,30 +220,53 @@ elif menu == "Complexes & Venues":
     st.subheader("Venues by country")
     st.dataframe(venues_grouped_by_country())
 
+    st.subheader("Find venues in country")
+    country_name = search_box("Country name", ["venue_country"], "venue_country")
+    if country_name:
+        st.dataframe(venues_in_country(country_name))
+
     st.subheader("Find venues for specific complex")
-    complex_name = st.text_input("Complex name (exact)", "")
+    complex_name = search_box("Complex name", ["complex"], "complex")
     if complex_name:
         st.dataframe(venues_for_complex(complex_name))
 
+    st.subheader("Search venues")
+    venue_q = st.text_input("Venue name", "", key="venue_q")
+    if venue_q:
+        st.dataframe(search(venue_q, kinds=["venue"]))
+
 # ---------- Rankings ----------
 elif menu == "Rankings":
     st.header("Doubles Competitor Rankings")
     df = competitors_with_rank_and_points()
     st.dataframe(df)
 
+    # Leaderboard widgets are served from the in-memory snapshot of the latest rankings
+    snap = get_snapshot()
+
     st.subheader("Top 5")
-    st.dataframe(top5_competitors())
+    st.dataframe(snap.top5_competitors())
 
     st.subheader("Stable ranks (movement = 0)")
-    st.dataframe(stable_rank_competitors())
+    st.dataframe(snap.stable_rank_competitors())
 
     st.subheader("Country-wise total points")
-    country = st.text_input("Country name (e.g., Croatia)", "")
+    country = search_box("Country name (e.g., Croatia)", ["country"], "rank_country")
     if country:
-        st.dataframe(total_points_by_country(country))
+        st.dataframe(snap.total_points_for_country(country))
+    else:
+        st.dataframe(snap.points_by_country())
+
+    st.subheader("Rank distribution")
+    st.dataframe(snap.rank_histogram())
 
     st.subheader("Leaderboard (highest points)")
-    st.dataframe(highest_points_current_week())
+    st.dataframe(snap.highest_points_current_week())
+
+    st.subheader("Search competitors")
+    competitor_q = st.text_input("Competitor name", "", key="competitor_q")
+    if competitor_q:
+        st.dataframe(search(competitor_q, kinds=["competitor"]))
 
 # ---------- Run SQL ----------
 elif menu == "Run SQL":
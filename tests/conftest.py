@@ -0,0 +1,55 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+# Configure before any project module is imported: config.py reads the environment at import.
+# Point DATABASE_URL at a PostgreSQL database to also run the Postgres-only tests.
+_tmp = tempfile.mkdtemp(prefix="sportradar-tests-")
+os.environ.setdefault("SPORT_RADAR_API_KEY", "test")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'test.db')}")
+os.environ.setdefault("CHANGELOG_DIR", os.path.join(_tmp, "changes"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import text
+from db_handler import engine
+from models import Base
+
+
+def make_payloads(n_competitors=3, points_offset=0, competition_name="Open 1"):
+    """Minimal Sportradar-shaped (competitions, complexes, rankings) payloads."""
+    competitions = {
+        "categories": [{"id": "sr:category:1", "name": "ATP"}],
+        "competitions": [
+            {"id": "sr:competition:1", "name": competition_name, "type": "doubles", "gender": "men",
+             "category": {"id": "sr:category:1"}},
+        ],
+    }
+    complexes = {
+        "complexes": [{"id": "sr:complex:1", "name": "Centre", "venues": [
+            {"id": "sr:venue:1", "name": "Court 1", "city_name": "Zagreb",
+             "country_name": "Croatia", "country_code": "HRV", "timezone": "Europe/Zagreb"},
+        ]}],
+    }
+    rankings = {"rankings": [{"competitor_rankings": [
+        {"rank": i, "movement": 0, "points": 1000 - i + points_offset, "competitions_played": 10,
+         "competitor": {"id": f"sr:competitor:{i}", "name": f"Player {i}", "country": "Croatia",
+                        "country_code": "HRV"}}
+        for i in range(1, n_competitors + 1)
+    ]}]}
+    return competitions, complexes, rankings
+
+
+def count(table):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar_one()
+
+
+@pytest.fixture
+def db():
+    """Fresh schema for every test."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,101 @@
+# tests/test_api_server.py
+import asyncio
+from http import HTTPStatus
+import pytest
+from api_server import ApiServer, HttpError
+from fetchers.fetch_competitions import process_and_store_competitions
+from conftest import make_payloads
+
+
+def get(api, target, headers=None):
+    return asyncio.run(api.dispatch("GET", target, headers or {}))
+
+
+def test_changes_since_rejects_non_integer(db):
+    with pytest.raises(HttpError) as exc:
+        get(ApiServer(workers=1), "/api/changes_since?last_change_id=abc")
+    assert exc.value.status == HTTPStatus.BAD_REQUEST
+
+
+def test_changes_since_etag_follows_new_changes(db, monkeypatch):
+    monkeypatch.setattr("api_server.GENERATION_TTL", 0)
+    competitions, _, _ = make_payloads()
+    process_and_store_competitions(competitions)
+    api = ApiServer(workers=1)
+    status, headers, _ = get(api, "/api/changes_since?last_change_id=0")
+    assert status == HTTPStatus.OK
+    etag = headers["ETag"]
+    assert get(api, "/api/changes_since?last_change_id=0", {"if-none-match": etag})[0] == HTTPStatus.NOT_MODIFIED
+
+    renamed, _, _ = make_payloads(competition_name="Renamed Open")
+    process_and_store_competitions(renamed)
+    status, headers, body = get(api, "/api/changes_since?last_change_id=0", {"if-none-match": etag})
+    assert status == HTTPStatus.OK
+    assert b"Renamed Open" in body
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("deflate;q=1.0, GZIP;q=0.5", True),
+    ("*", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.000, deflate", False),
+    ("*;q=0", False),
+    ("*, gzip;q=0", False),
+    ("identity", False),
+    ("", False),
+])
+def test_accepts_gzip_honours_q_values(header, expected):
+    assert ApiServer.accepts_gzip(header) is expected
+
+
+def test_gzip_q0_is_not_compressed(db, monkeypatch):
+    monkeypatch.setattr("api_server.GZIP_MIN_BYTES", 0)
+    api = ApiServer(workers=1)
+    _, headers, _ = get(api, "/api/top5_competitors", {"accept-encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in headers
+    _, headers, _ = get(api, "/api/top5_competitors", {"accept-encoding": "gzip"})
+    assert headers["Content-Encoding"] == "gzip"
+
+
+class _Writer:
+    def __init__(self):
+        self.data, self.closed = bytearray(), False
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def _raw_request(api, raw):
+    """Feed raw bytes to ApiServer.handle; returns everything written back."""
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        writer = _Writer()
+        await api.handle(reader, writer)
+        return bytes(writer.data), writer.closed
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("request_line", [b"GARBAGE", b"GET /", b"GET  / HTTP/1.1", b"GET / FTP/1.0"])
+def test_malformed_request_line_gets_400_and_close(request_line):
+    # a well-formed request pipelined after it must not be answered
+    raw = request_line + b"\r\n\r\nGET /health HTTP/1.1\r\n\r\n"
+    data, closed = _raw_request(ApiServer(workers=1), raw)
+    assert data.startswith(b"HTTP/1.1 400 ")
+    assert b"Connection: close" in data
+    assert data.count(b"HTTP/1.1 ") == 1
+    assert closed
+
+
+def test_well_formed_request_is_served():
+    data, _ = _raw_request(ApiServer(workers=1), b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert data.startswith(b"HTTP/1.1 200 ")
@@ -0,0 +1,63 @@
+# tests/test_changelog.py
+import pytest
+from sqlalchemy import text
+from db_handler import engine
+import changelog
+from checkpoints import start_or_resume_run, load_batches
+from shadow_load import swap_load
+from fetchers.fetch_competitions import process_and_store_competitions
+from fetchers.fetch_doubles_rankings import parse_rankings, process_and_store_rankings
+from conftest import make_payloads, count
+
+
+def _ranking_changes():
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT COUNT(*) FROM change_log WHERE table_name = 'competitor_rankings'"
+        )).scalar_one()
+
+
+def test_unchanged_rankings_are_not_logged(db):
+    _, _, rankings = make_payloads(n_competitors=3)
+    process_and_store_rankings(rankings)
+    assert _ranking_changes() == 3
+
+    # same standings again: rows are appended but nothing changed
+    process_and_store_rankings(rankings)
+    assert count("competitor_rankings") == 6
+    assert _ranking_changes() == 3
+
+    _, _, moved = make_payloads(n_competitors=3, points_offset=5)
+    process_and_store_rankings(moved)
+    assert _ranking_changes() == 6
+
+
+def test_publish_failure_does_not_fail_a_committed_load(db, monkeypatch):
+    def unavailable():
+        raise PermissionError("changes.jsonl is read-only")
+
+    monkeypatch.setattr(changelog, "_feed_logger", unavailable)
+    competitors, rankings = parse_rankings(make_payloads(n_competitors=3)[2])
+    run_id = start_or_resume_run(fresh=True)
+    datasets = [("competitors", competitors), ("competitor_rankings", rankings)]
+    assert load_batches(run_id, "doubles_rankings", datasets) == (2, 0)
+    assert count("competitor_rankings") == 3
+    assert _ranking_changes() == 3
+
+    swap_load([("competitors", [dict(c, name=c["name"] + " Jr") for c in competitors])])
+    assert count("competitors") == 3
+
+
+def test_failed_orm_load_leaves_no_unlogged_rows(db, monkeypatch):
+    def fails(*args, **kwargs):
+        raise RuntimeError("change_log unavailable")
+
+    monkeypatch.setattr(changelog, "record_changes", fails)
+    competitions, _, rankings = make_payloads(n_competitors=3)
+    with pytest.raises(RuntimeError):
+        process_and_store_rankings(rankings)
+    with pytest.raises(RuntimeError):
+        process_and_store_competitions(competitions)
+    # data and change entries commit together, so nothing was written
+    for table in ("competitors", "competitor_rankings", "categories", "competitions"):
+        assert count(table) == 0
@@ -0,0 +1,120 @@
+# tests/test_checkpoints.py
+from datetime import timedelta
+import pytest
+from sqlalchemy import text
+import etl_run
+from checkpoints import start_or_resume_run, finish_run, fetch_with_checkpoint, _now
+from db_handler import engine, SessionLocal
+from models import EtlRun
+from conftest import make_payloads, count
+
+
+@pytest.fixture
+def endpoints(monkeypatch):
+    """Replace the API fetchers with fixed payloads; returns the list of fetched endpoints."""
+    fetched = []
+    payloads = make_payloads(n_competitors=5)
+
+    def fetcher(name, payload):
+        def fetch():
+            fetched.append(name)
+            return payload
+        return fetch
+
+    monkeypatch.setattr(etl_run, "ENDPOINTS", [
+        (name, fetcher(name, payload), to_datasets)
+        for (name, _, to_datasets), payload in zip(etl_run.ENDPOINTS, payloads)
+    ])
+    monkeypatch.setattr(etl_run, "build_search_index", lambda: None)
+    return fetched
+
+
+def test_swap_is_not_reapplied_when_resuming(db, endpoints, monkeypatch):
+    monkeypatch.setattr(etl_run, "ETL_LOAD_MODE", "swap")
+    real_finish = etl_run.finish_run
+    calls = []
+
+    def finish_fails_once(run_id, error=None):
+        calls.append(error)
+        if error is None and len(calls) == 1:
+            raise RuntimeError("lost connection after the swap committed")
+        return real_finish(run_id, error)
+
+    monkeypatch.setattr(etl_run, "finish_run", finish_fails_once)
+    with pytest.raises(RuntimeError):
+        etl_run.main()
+    assert count("competitor_rankings") == 5
+
+    etl_run.main()
+    assert count("competitor_rankings") == 5
+
+
+def _payloads():
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT payload FROM etl_checkpoints WHERE step = 'fetch' ORDER BY checkpoint_id"
+        )).scalars().all()
+
+
+def test_merge_run_resumes_and_clears_payloads(db, endpoints, monkeypatch):
+    monkeypatch.setattr(etl_run, "ETL_LOAD_MODE", "merge")
+    real_load = etl_run.load_batches
+
+    def rankings_fail_once(run_id, endpoint, datasets, *args, **kwargs):
+        if endpoint == "doubles_rankings" and endpoints.count(endpoint) == 1:
+            raise RuntimeError("connection dropped")
+        return real_load(run_id, endpoint, datasets, *args, **kwargs)
+
+    monkeypatch.setattr(etl_run, "load_batches", rankings_fail_once)
+    with pytest.raises(RuntimeError):
+        etl_run.main()
+    assert count("competitions") == 1
+    assert count("competitor_rankings") == 0
+    assert all(p is not None for p in _payloads())
+
+    # the rerun reuses every stored payload and skips the endpoints already loaded
+    monkeypatch.setattr(etl_run, "load_batches", real_load)
+    etl_run.main()
+    assert endpoints == ["competitions", "complexes", "doubles_rankings"]
+    assert count("competitions") == 1
+    assert count("competitor_rankings") == 5
+    assert len(_payloads()) == 3 and all(p is None for p in _payloads())
+
+
+def _age_run(run_id, hours):
+    session = SessionLocal()
+    try:
+        session.get(EtlRun, run_id).started_at = _now() - timedelta(hours=hours)
+        session.commit()
+    finally:
+        session.close()
+
+
+def test_only_a_recent_failed_latest_run_is_resumed(db):
+    running = start_or_resume_run()
+    # still 'running' (maybe in another process): never picked up
+    assert start_or_resume_run() != running
+
+    failed = start_or_resume_run(fresh=True)
+    finish_run(failed, error=RuntimeError("boom"))
+    assert start_or_resume_run(max_age_hours=6) == failed
+    # now claimed as running, so an overlapping invocation starts its own run
+    assert start_or_resume_run(max_age_hours=6) != failed
+
+    stale = start_or_resume_run(fresh=True)
+    finish_run(stale, error=RuntimeError("boom"))
+    _age_run(stale, hours=30)
+    assert start_or_resume_run(max_age_hours=6) != stale
+
+    older_failed = start_or_resume_run(fresh=True)
+    finish_run(older_failed, error=RuntimeError("boom"))
+    finish_run(start_or_resume_run(fresh=True))
+    # a newer run completed since; resuming the older failure would load stale payloads
+    assert start_or_resume_run(max_age_hours=6) != older_failed
+
+
+def test_reused_payload_age_is_logged(db, capsys):
+    run_id = start_or_resume_run()
+    fetch_with_checkpoint(run_id, "competitions", lambda: {"competitions": []})
+    assert fetch_with_checkpoint(run_id, "competitions", lambda: pytest.fail("refetched")) == {"competitions": []}
+    assert "reusing payload fetched 0.0h ago" in capsys.readouterr().out
@@ -0,0 +1,92 @@
+# tests/test_debug_rankings.py
+import json
+from sqlalchemy.engine import Connection
+import debug_rankings
+from debug_rankings import explain, compare_to_baseline, profile
+from fetchers.fetch_doubles_rankings import process_and_store_rankings
+from conftest import make_payloads
+
+
+class _PgConn:
+    """Stands in for a PostgreSQL connection answering EXPLAIN (FORMAT JSON) with `plan`."""
+
+    class dialect:
+        name = "postgresql"
+
+    def __init__(self, plan):
+        self.plan = plan
+
+    def execute(self, stmt, params=None):
+        plan = self.plan
+
+        class Result:
+            def scalar(self):
+                return json.dumps(plan)
+        return Result()
+
+
+def test_explain_flags_postgres_plan():
+    plan = [{"Plan": {"Node Type": "Sort", "Sort Method": "external merge", "Actual Rows": 10,
+                      "Actual Total Time": 1.5, "Plans": [
+                          {"Node Type": "Seq Scan", "Relation Name": "competitors", "Actual Rows": 10,
+                           "Actual Total Time": 0.2},
+                          {"Node Type": "Index Scan", "Relation Name": "competitor_rankings"},
+                      ]}}]
+    lines, flags = explain(_PgConn(plan), "SELECT 1;", {})
+    assert flags == ["external_sort", "full_scan:competitors"]
+    assert lines[0] == "Sort (rows=10, ms=1.5)"
+    assert lines[1] == "  Seq Scan competitors (rows=10, ms=0.2)"
+
+
+def test_explain_flags_sqlite_plan(db):
+    with db.connect() as conn:
+        _, flags = explain(conn, "SELECT * FROM competitors ORDER BY name", {})
+        assert "full_scan:competitors" in flags
+        assert "temp_btree:order_by" in flags
+        _, flags = explain(conn, "SELECT * FROM competitors WHERE competitor_id = :id", {"id": "x"})
+        assert flags == []
+
+
+def _report(**queries):
+    return {"queries": queries}
+
+
+def test_compare_to_baseline():
+    baseline = _report(
+        a={"flags": ["full_scan:x"], "p95_ms": 2.0},
+        b={"flags": [], "p95_ms": 2.0},
+        c={"flags": [], "p95_ms": 0.1},
+        d={"flags": [], "p95_ms": 1.0},
+        e={"error": "was broken"},
+    )
+    report = _report(
+        a={"flags": ["full_scan:x"], "p95_ms": 2.5},                   # within tolerance
+        b={"flags": ["temp_btree:order_by"], "p95_ms": 4.0},           # new flag + 2x slower
+        c={"flags": [], "p95_ms": 0.9},                                # 9x, but under REGRESSION_MIN_MS
+        d={"error": "no such table"},
+        e={"flags": [], "p95_ms": 50.0},                               # no usable baseline
+        f={"flags": ["full_scan:y"], "p95_ms": 9.0},                   # new query
+    )
+    assert compare_to_baseline(report, report) == []
+    assert compare_to_baseline(report, baseline) == [
+        "b: new plan flags ['temp_btree:order_by']",
+        "b: p95 2.0ms -> 4.0ms",
+        "d: now fails (no such table)",
+    ]
+
+
+def test_profile_continues_after_a_failing_query(db, monkeypatch):
+    process_and_store_rankings(make_payloads()[2])
+    monkeypatch.setattr(debug_rankings, "capture_queries", lambda params: {
+        "a_broken": ("SELECT * FROM no_such_table", {}),
+        "b_ok": ("SELECT COUNT(*) FROM competitors", {}),
+    })
+    rollbacks = []
+    real_rollback = Connection.rollback
+    monkeypatch.setattr(Connection, "rollback", lambda self: rollbacks.append(1) or real_rollback(self))
+    report = profile(repeat=2)
+    # PostgreSQL would abort the transaction here; the profiler must start a new one
+    assert rollbacks
+    assert "error" in report["queries"]["a_broken"]
+    assert report["queries"]["b_ok"]["rows"] == 1
+    assert report["storage"]["tables"]["competitors"]["rows"] == 3
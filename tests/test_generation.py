@@ -0,0 +1,29 @@
+# tests/test_generation.py
+from fetchers.fetch_competitions import process_and_store_competitions
+from fetchers.fetch_complexes import process_and_store_complexes
+from queries import data_generation
+from conftest import make_payloads
+
+
+def test_generation_moves_on_updates(db):
+    competitions, complexes, _ = make_payloads()
+    process_and_store_competitions(competitions)
+    process_and_store_complexes(complexes)
+    before = data_generation()
+
+    # same payload again: nothing changed
+    process_and_store_competitions(competitions)
+    assert data_generation() == before
+
+    renamed, _, _ = make_payloads(competition_name="Renamed Open")
+    process_and_store_competitions(renamed)
+    assert data_generation() != before
+
+
+def test_generation_moves_on_complex_rename(db):
+    _, complexes, _ = make_payloads()
+    process_and_store_complexes(complexes)
+    before = data_generation()
+    complexes["complexes"][0]["name"] = "New Centre"
+    process_and_store_complexes(complexes)
+    assert data_generation() != before
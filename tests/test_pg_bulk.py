@@ -0,0 +1,72 @@
+# tests/test_pg_bulk.py
+"""Postgres-only: run with DATABASE_URL=postgresql+psycopg2://localhost/tennis_test python -m pytest"""
+import pytest
+from sqlalchemy import text
+import pg_bulk
+import shadow_load
+from db_handler import engine
+from checkpoints import start_or_resume_run, load_batches
+from fetchers.fetch_doubles_rankings import parse_rankings
+from conftest import make_payloads, count
+
+pytestmark = pytest.mark.skipif(engine.dialect.name != "postgresql", reason="needs DATABASE_URL=postgresql://...")
+
+
+def _competitor(i, **values):
+    return {"competitor_id": f"sr:competitor:{i}", "name": f"Player {i}", "country": "Croatia",
+            "country_code": "HRV", "abbreviation": None, **values}
+
+
+def _rows(sql):
+    with engine.connect() as conn:
+        return [dict(r) for r in conn.execute(text(sql)).mappings()]
+
+
+def test_copy_escapes_special_characters(db):
+    names = ["tab\there", "new\nline", "carriage\rreturn", "back\\slash", "\\N", ""]
+    pg_bulk.bulk_load([("competitors", [_competitor(i, name=n) for i, n in enumerate(names)])])
+    stored = _rows("SELECT competitor_id, name, abbreviation FROM competitors ORDER BY competitor_id")
+    assert [r["name"] for r in stored] == names
+    assert all(r["abbreviation"] is None for r in stored)
+
+
+def test_last_key_wins_within_a_batch(db):
+    pg_bulk.bulk_load([("competitors", [_competitor(1, name="First"), _competitor(2),
+                                        _competitor(1, name="Last")])])
+    assert count("competitors") == 2
+    assert _rows("SELECT name FROM competitors WHERE competitor_id = 'sr:competitor:1'") == [{"name": "Last"}]
+
+
+def test_rankings_are_appended_in_input_order(db):
+    competitors, rankings = parse_rankings(make_payloads(n_competitors=3)[2])
+    assert pg_bulk.bulk_load_rankings(competitors, rankings) == 3
+    assert pg_bulk.bulk_load_rankings(competitors, rankings) == 3
+    assert count("competitor_rankings") == 6
+    stored = _rows("SELECT competitor_id FROM competitor_rankings ORDER BY rank_id")
+    assert [r["competitor_id"] for r in stored] == [r["competitor_id"] for r in rankings] * 2
+
+
+def test_rerun_skips_committed_batches(db):
+    competitors, rankings = parse_rankings(make_payloads(n_competitors=5)[2])
+    datasets = [("competitors", competitors), ("competitor_rankings", rankings)]
+    run_id = start_or_resume_run(fresh=True)
+    assert load_batches(run_id, "doubles_rankings", datasets, batch_size=2) == (6, 0)
+    assert load_batches(run_id, "doubles_rankings", datasets, batch_size=2) == (0, 6)
+    assert count("competitors") == 5
+    assert count("competitor_rankings") == 5
+
+
+def test_swap_load_upserts_and_advances_the_rankings_serial(db):
+    competitors, rankings = parse_rankings(make_payloads(n_competitors=3)[2])
+    pg_bulk.bulk_load_rankings(competitors, rankings)
+
+    renamed = [dict(c, name=c["name"] + " Jr") for c in competitors]
+    shadow_load.swap_load([("competitors", renamed + renamed[:1]), ("competitor_rankings", rankings)])
+    assert count("competitors") == 3
+    assert {r["name"] for r in _rows("SELECT name FROM competitors")} == {c["name"] for c in renamed}
+    assert count("competitor_rankings") == 6
+
+    # the swapped-in table's serial continues past the copied rank_ids
+    pg_bulk.bulk_load_rankings(competitors, rankings)
+    assert count("competitor_rankings") == 9
+    assert _rows("SELECT COUNT(DISTINCT rank_id) AS n FROM competitor_rankings") == [{"n": 9}]
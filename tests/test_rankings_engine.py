@@ -0,0 +1,65 @@
+# tests/test_rankings_engine.py
+import numpy as np
+from fetchers.fetch_doubles_rankings import process_and_store_rankings
+from queries import top5_competitors
+from rankings_engine import RankingsSnapshot, load_snapshot
+
+
+def _row(i, rank, points, country="Croatia", movement=0):
+    return {"competitor_id": f"sr:competitor:{i}", "name": f"Player {i}", "country": country,
+            "country_code": country[:3].upper(), "abbreviation": None, "rank": rank, "points": points,
+            "movement": movement, "competitions_played": 10}
+
+
+def _two_groups(n=6):
+    """ATP and WTA ranking groups, both ranked 1..n."""
+    return {"rankings": [
+        {"name": group, "competitor_rankings": [
+            {"rank": r, "movement": 0, "points": 1000 - r, "competitions_played": 10,
+             "competitor": {"id": f"sr:competitor:{group}{r}", "name": f"{group} {r}",
+                            "country": "Croatia", "country_code": "HRV"}}
+            for r in range(1, n + 1)
+        ]}
+        for group in ("ATP", "WTA")
+    ]}
+
+
+def test_top5_matches_the_query_across_ranking_groups(db):
+    process_and_store_rankings(_two_groups())
+    expected = top5_competitors()
+    top5 = load_snapshot().top5_competitors()
+    assert len(expected) == len(top5) == 10
+    assert sorted(top5["competitor_id"]) == sorted(expected["competitor_id"])
+    assert top5["rank"].tolist() == sorted(top5["rank"].tolist())
+
+
+def test_top_k_and_ties():
+    snap = RankingsSnapshot([_row(1, 3, 50), _row(2, 1, 90), _row(3, 2, 70), _row(4, 1, 80)])
+    assert snap.rank[snap.top_k_by_rank(2)].tolist() == [1, 1]
+    assert snap.points[snap.top_k_by_points(1)].tolist() == [90]
+    assert snap.rank[snap.ranked_at_most(2)].tolist() == [1, 1, 2]
+    assert snap.top_k_by_rank(10).size == 4
+
+
+def test_points_by_country_and_histogram():
+    snap = RankingsSnapshot([_row(1, 1, 100, "Spain"), _row(2, 2, 40, "Croatia"),
+                             _row(3, 60, 30, "Croatia"), _row(4, 120, 5, "Spain")])
+    by_country = snap.points_by_country()
+    assert by_country.to_dict("records") == [{"country": "Spain", "total_points": 105},
+                                             {"country": "Croatia", "total_points": 70}]
+    assert snap.total_points_for_country(" spain ")["total_points"].tolist() == [105]
+    assert snap.total_points_for_country("Atlantis").empty
+    hist = snap.rank_histogram(bin_size=50)
+    assert hist.to_dict("records") == [{"rank_from": 1, "rank_to": 50, "competitors": 2},
+                                       {"rank_from": 51, "rank_to": 100, "competitors": 1},
+                                       {"rank_from": 101, "rank_to": 150, "competitors": 1}]
+
+
+def test_empty_snapshot():
+    snap = RankingsSnapshot([])
+    assert len(snap) == 0
+    assert snap.top_k_by_rank(5).size == 0 and snap.top_k_by_points(1).size == 0
+    assert snap.top5_competitors().empty
+    assert snap.points_by_country().empty
+    assert snap.rank_histogram().empty
+    assert isinstance(snap.ranked_at_most(5), np.ndarray)
@@ -0,0 +1,51 @@
+# tests/test_search_index.py
+import search_index
+from search_index import fold
+from fetchers.fetch_competitions import process_and_store_competitions
+from fetchers.fetch_complexes import process_and_store_complexes
+from fetchers.fetch_doubles_rankings import process_and_store_rankings
+from queries import data_generation
+from conftest import make_payloads
+
+
+def test_fold_transliterates_non_decomposable_letters():
+    assert fold("Łódź Søren Straße") == "lodz soren strasse"
+    assert fold("Ærø Đoković Þór") == "aero dokovic thor"
+    assert fold("São  Paulo!") == "sao paulo"
+
+
+def test_prefix_search_finds_transliterated_names(db):
+    competitions, _, _ = make_payloads(competition_name="Łódź Cup")
+    competitions["competitions"].append(
+        {"id": "sr:competition:2", "name": "Søren Classic", "type": "doubles", "gender": "men",
+         "category": {"id": "sr:category:1"}})
+    process_and_store_competitions(competitions)
+    search_index.build_search_index()
+
+    assert search_index.search("Lod", kinds=["competition"])["name"].tolist()[:1] == ["Łódź Cup"]
+    assert search_index.search("sor", kinds=["competition"])["name"].tolist()[:1] == ["Søren Classic"]
+
+
+def test_stale_fts_table_falls_back_to_fresh_index(db):
+    competitions, _, _ = make_payloads(competition_name="Open 1")
+    process_and_store_competitions(competitions)
+    search_index.build_search_index()
+    assert search_index._fts_search("open", None, 5, data_generation()) is not None
+
+    renamed, _, _ = make_payloads(competition_name="Renamed Masters")
+    process_and_store_competitions(renamed)
+    # loaded data moved on without a rebuild: the FTS table must not answer
+    assert search_index._fts_search("renamed", None, 5, data_generation()) is None
+    assert search_index.search("Renamed", kinds=["competition"])["name"].tolist() == ["Renamed Masters"]
+
+
+def test_venue_country_kind_only_lists_countries_with_venues(db):
+    _, complexes, rankings = make_payloads()
+    rankings["rankings"][0]["competitor_rankings"][0]["competitor"]["country"] = "Spain"
+    process_and_store_complexes(complexes)
+    process_and_store_rankings(rankings)
+    search_index.build_search_index()
+
+    assert search_index.search("Spain", kinds=["country"])["name"].tolist() == ["Spain"]
+    assert search_index.search("Spain", kinds=["venue_country"]).empty
+    assert search_index.search("Croatia", kinds=["venue_country"])["name"].tolist() == ["Croatia"]